@@ -3,10 +3,15 @@ from flask_cors import CORS
 import sys
 import os
 import json
+import logging
 
 # Add modules directory to path
 sys.path.append(os.path.dirname(__file__))
 
+# Backends that log (e.g. purchase orders) print plain lines to the console,
+# same as the print() output of the others
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
 # Import backend modules
 try:
     from ledgers import ledgers_backend as ledgers_module
@@ -411,8 +416,9 @@ def api_sync_purchase_orders():
         from_date = request.json.get("from_date", "20250401") if request.is_json else "20250401"
         to_date = request.json.get("to_date", "20250430") if request.is_json else "20250430"
         limit = request.json.get("limit") if request.is_json else None
+        refresh = bool(request.json.get("refresh")) if request.is_json else False
         
-        result = purchase_order_module.sync_purchase_orders_to_zoho(selected, from_date, to_date, limit)
+        result = purchase_order_module.sync_purchase_orders_to_zoho(selected, from_date, to_date, limit, refresh)
         return jsonify(result)
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
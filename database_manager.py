@@ -51,6 +51,14 @@ def init_db():
         )
     ''')
     
+    # GROUP HASHES (change detection for incremental group sync)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS groups_hashes (
+            name TEXT PRIMARY KEY,
+            hash TEXT
+        )
+    ''')
+    
     # LEDGERS TABLE
     # Expanded to include all fields found in ledgers_backend.py
     cursor.execute('''
@@ -194,6 +202,35 @@ def insert_or_update_group(data):
         print(f"Error saving group {data.get('name')}: {e}")
 
 
+def bulk_save_groups(groups_data, hashes_data):
+    """
+    Upsert changed groups and their change-detection hashes in two executemany calls.
+    """
+    if not groups_data:
+        return
+
+    conn = get_db_connection(write=True)
+    cursor = conn.cursor()
+
+    try:
+        cursor.executemany('''
+            INSERT INTO groups (name, parent, primary_group)
+            VALUES (:name, :parent, :primary_group)
+            ON CONFLICT(name) DO UPDATE SET
+                parent=excluded.parent,
+                primary_group=excluded.primary_group
+        ''', groups_data)
+        cursor.executemany('''
+            INSERT INTO groups_hashes (name, hash)
+            VALUES (:name, :hash)
+            ON CONFLICT(name) DO UPDATE SET
+                hash=excluded.hash
+        ''', hashes_data)
+        conn.commit()
+    except Exception as e:
+        print(f"Error bulk saving {len(groups_data)} groups: {e}")
+
+
 def insert_or_update_ledger(data):
     conn = get_db_connection(write=True)
     cursor = conn.cursor()
@@ -227,6 +264,45 @@ def insert_or_update_ledger(data):
         print(f"Error saving ledger {data.get('name')}: {e}")
 
 
+def bulk_save_ledgers(ledgers_data):
+    """
+    Save multiple ledgers using a SINGLE write connection and one executemany.
+    """
+    if not ledgers_data:
+        return
+
+    conn = get_db_connection(write=True)
+    cursor = conn.cursor()
+
+    try:
+        cursor.executemany('''
+            INSERT INTO ledgers (
+                name, parent, type, address, state, country, pincode, email, phone,
+                gstin, gst_reg_type, pan, opening_balance, closing_balance
+            ) VALUES (
+                :name, :parent, :type, :address, :state, :country, :pincode, :email, :phone,
+                :gstin, :gst_reg_type, :pan, :opening_balance, :closing_balance
+            )
+            ON CONFLICT(name) DO UPDATE SET
+                parent=excluded.parent,
+                type=excluded.type,
+                address=excluded.address,
+                state=excluded.state,
+                country=excluded.country,
+                pincode=excluded.pincode,
+                email=excluded.email,
+                phone=excluded.phone,
+                gstin=excluded.gstin,
+                gst_reg_type=excluded.gst_reg_type,
+                pan=excluded.pan,
+                opening_balance=excluded.opening_balance,
+                closing_balance=excluded.closing_balance
+        ''', ledgers_data)
+        conn.commit()
+    except Exception as e:
+        print(f"Error bulk saving {len(ledgers_data)} ledgers: {e}")
+
+
 def insert_or_update_item(data):
     conn = get_db_connection(write=True)
     cursor = conn.cursor()
@@ -295,6 +371,17 @@ def get_ledger_by_name(name):
     conn.close()
     return dict(ledger) if ledger else None
 
+def get_group_hashes():
+    conn = get_db_connection()
+    hashes = {}
+    try:
+        rows = conn.execute('SELECT name, hash FROM groups_hashes').fetchall()
+        hashes = {row["name"]: row["hash"] for row in rows}
+    except sqlite3.OperationalError:
+        pass
+    conn.close()
+    return hashes
+
 def get_all_groups():
     conn = get_db_connection()
     groups = conn.execute('SELECT * FROM groups').fetchall()
@@ -1,9 +1,11 @@
 import requests
-import re
-from collections import defaultdict
+from collections import defaultdict, deque
 import sys
 import os
 import json
+import hashlib
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import mapping_manager
 
 # Ensure root directory is in path to import database_manager
@@ -17,27 +19,53 @@ except ImportError:
 
 # ... (rest of imports)
 
+# etree is None when lxml is missing (stdlib fallback)
+from modules.tally_xml import etree, iter_tally_elements
+
 # ----------------------------------------------------------
 # XML HELPERS
 # ----------------------------------------------------------
 
-def extract_field(xml_block, tag):
-    """Extract first occurrence <TAG>value</TAG>"""
-    match = re.search(rf"<{tag}>(.*?)</{tag}>", xml_block, re.DOTALL)
-    return match.group(1).strip() if match else ""
+# Drops embedded carriage returns / newlines in one C-level pass
+_NL_TABLE = str.maketrans("", "", "\r\n")
+
+# Every ledger field read by fetch_ledgers_from_tally, collected in one walk
+_LEDGER_TAGS = (
+    "PARENT", "OPENINGBALANCE", "CLOSINGBALANCE",
+    "GSTIN", "GSTREGISTRATIONTYPE", "INCOMETAXNUMBER",
+    "ADDRESS", "STATENAME", "LEDSTATENAME", "MAILSTATENAME", "PRIORSTATENAME",
+    "COUNTRY", "PINCODE", "PHONE", "EMAIL",
+)
+
+
+def extract_fields(elem, tags):
+    """Collect the stripped text of every <TAG> in tags under elem, in one pass"""
+    fields = defaultdict(list)
+    if etree is not None:
+        matches = elem.iter(*tags)
+    else:
+        # ElementTree.iter() accepts a single tag only
+        matches = (e for e in elem.iter() if e.tag in tags)
+    for e in matches:
+        fields[e.tag].append((e.text or "").strip())
+    return fields
 
 
-def extract_all_fields(xml_block, tag):
-    """Extract all repeated tags like <ADDRESS>"""
-    matches = re.findall(rf"<{tag}>(.*?)</{tag}>", xml_block, re.DOTALL)
-    return [m.strip() for m in matches if m.strip()]
+def extract_field(elem, tag):
+    """Extract first occurrence <TAG>value</TAG> under elem"""
+    return (elem.findtext(f".//{tag}") or "").strip()
 
 
 # ----------------------------------------------------------
 # FETCH GROUPS
 # ----------------------------------------------------------
 
-def fetch_groups_from_tally():
+def fetch_groups_from_tally(children_map=None):
+    """
+    Fetch all Tally groups. If a children_map (parent -> [names]) is passed,
+    it is filled during the same streaming pass, so callers don't need a
+    separate build_group_hierarchy() over the result.
+    """
     # Initialize DB if possible
     if database_manager:
         database_manager.init_db()
@@ -59,41 +87,58 @@ def fetch_groups_from_tally():
     try:
         response = requests.post("http://localhost:9000",
                                  data=xml_request.encode("utf-8"),
-                                 timeout=60)
-        xml_data = response.text
-
-        group_blocks = re.findall(
-            r'<GROUP NAME="([^"]*)"[^>]*>(.*?)</GROUP>',
-            xml_data, re.DOTALL
-        )
+                                 timeout=60,
+                                 stream=True)
 
         groups = []
 
-        for name, block in group_blocks:
+        # Only groups whose (name, parent) changed since the last fetch are written
+        existing_hashes = database_manager.get_group_hashes() if database_manager else {}
+        changed_groups = []
+        changed_hashes = []
+
+        for group_elem in iter_tally_elements(response, "GROUP"):
+            name = group_elem.get("NAME")
             if not name or name == "?":
                 continue
 
+            # Group names repeat as every ledger's parent — share one string each
             group_data = {
-                "name": name.replace("&amp;", "&"),
-                "parent": extract_field(block, "PARENT")
+                "name": sys.intern(name),
+                "parent": sys.intern(extract_field(group_elem, "PARENT"))
             }
             groups.append(group_data)
-            
-            # ------------------------------------------------
-            # SAVE TO SQLITE
-            # ------------------------------------------------
-            if database_manager:
-                database_manager.insert_or_update_group({
-                    "name": group_data["name"],
-                    "parent": group_data["parent"],
-                    "primary_group": "" # Tally doesn't explicitly give this easily here without traversal
-                })
+            if children_map is not None:
+                children_map[group_data["parent"]].append(group_data["name"])
+
+            group_hash = hashlib.blake2b(
+                f"{group_data['name']}|{group_data['parent']}".encode("utf-8"),
+                digest_size=8
+            ).hexdigest()
+            if existing_hashes.get(group_data["name"]) == group_hash:
+                continue
+
+            changed_groups.append({
+                "name": group_data["name"],
+                "parent": group_data["parent"],
+                "primary_group": "" # Tally doesn't explicitly give this easily here without traversal
+            })
+            changed_hashes.append({"name": group_data["name"], "hash": group_hash})
+
+        # ------------------------------------------------
+        # SAVE TO SQLITE
+        # ------------------------------------------------
+        if database_manager and changed_groups:
+            database_manager.bulk_save_groups(changed_groups, changed_hashes)
+            print(f"💾 Groups changed since last fetch: {len(changed_groups)}")
 
         print(f"✅ Groups fetched: {len(groups)}")
         return groups
 
     except Exception as e:
         print("❌ Error fetching groups:", e)
+        if children_map is not None:
+            children_map.clear()
         return []
 
 
@@ -122,52 +167,59 @@ def fetch_ledgers_from_tally():
         response = requests.post(
             "http://localhost:9000",
             data=xml_request.encode("utf-8"),
-            timeout=60
-        )
-        xml_data = response.text
-
-        ledger_blocks = re.findall(
-            r'<LEDGER NAME="([^"]*)"[^>]*>(.*?)</LEDGER>',
-            xml_data, re.DOTALL
+            timeout=60,
+            stream=True
         )
 
         ledgers = []
 
-        for ledger_name, ledger_block in ledger_blocks:
+        for ledger_block in iter_tally_elements(response, "LEDGER"):
+
+            ledger_name = ledger_block.get("NAME")
+            if ledger_name is None:
+                continue
+            # Normalised once here so the Zoho sync loop doesn't redo it per ledger
+            ledger_name = ledger_name.translate(_NL_TABLE).strip()
+
+            fields = extract_fields(ledger_block, _LEDGER_TAGS)
 
-            ledger_name = ledger_name.replace("&amp;", "&")
+            def first(tag):
+                values = fields.get(tag)
+                return values[0] if values else ""
 
             # MULTI-LINE ADDRESS FIX
-            address_lines = extract_all_fields(ledger_block, "ADDRESS")
+            address = "\n".join(a for a in fields.get("ADDRESS", ()) if a)
 
+            # parent/state/country come from a small vocabulary and are interned
+            # so thousands of ledgers share one string object per value
             # FIX — STATE FALLBACK LOGIC
-            state = (
-                extract_field(ledger_block, "STATENAME")
-                or extract_field(ledger_block, "LEDSTATENAME")
-                or extract_field(ledger_block, "MAILSTATENAME")
-                or extract_field(ledger_block, "PRIORSTATENAME")
+            state = sys.intern(
+                first("STATENAME")
+                or first("LEDSTATENAME")
+                or first("MAILSTATENAME")
+                or first("PRIORSTATENAME")
             )
 
             ledgers.append({
                 "name": ledger_name,
-                "parent": extract_field(ledger_block, "PARENT"),
+                "name_key": ledger_name.lower(),
+                "parent": sys.intern(first("PARENT")),
 
-                "opening_balance": extract_field(ledger_block, "OPENINGBALANCE"),
-                "closing_balance": extract_field(ledger_block, "CLOSINGBALANCE"),
+                "opening_balance": first("OPENINGBALANCE"),
+                "closing_balance": first("CLOSINGBALANCE"),
 
-                "gstin": extract_field(ledger_block, "GSTIN"),
-                "gst_reg_type": extract_field(ledger_block, "GSTREGISTRATIONTYPE"),
-                "pan": extract_field(ledger_block, "INCOMETAXNUMBER"),
+                "gstin": first("GSTIN"),
+                "gst_reg_type": first("GSTREGISTRATIONTYPE"),
+                "pan": first("INCOMETAXNUMBER"),
 
-                "address_lines": address_lines,
-                "address": "\n".join(address_lines),
+                "address": address,
 
                 "state": state,
-                "country": extract_field(ledger_block, "COUNTRY"),
-                "pincode": extract_field(ledger_block, "PINCODE"),
+                "country": sys.intern(first("COUNTRY")),
+                "pincode": first("PINCODE"),
 
-                "phone": extract_field(ledger_block, "PHONE"),
-                "email": extract_field(ledger_block, "EMAIL"),
+                "phone": first("PHONE"),
+                "email": first("EMAIL"),
             })
 
         print(f"✅ Ledgers fetched: {len(ledgers)}")
@@ -189,21 +241,18 @@ def build_group_hierarchy(groups):
     return children_map
 
 
-def get_all_descendants(group_name, children_map, visited=None):
-    if visited is None:
-        visited = set()
-
-    if group_name in visited:
-        return []
-
-    visited.add(group_name)
+def get_all_descendants(group_name, children_map):
+    """All groups below group_name, breadth-first (iterative, so deep trees are safe)"""
+    seen = {group_name}
     descendants = []
+    queue = deque([group_name])
 
-    children = children_map.get(group_name, [])
-    descendants.extend(children)
-
-    for child in children:
-        descendants.extend(get_all_descendants(child, children_map, visited))
+    while queue:
+        for child in children_map.get(queue.popleft(), ()):
+            if child not in seen:
+                seen.add(child)
+                descendants.append(child)
+                queue.append(child)
 
     return descendants
 
@@ -213,8 +262,9 @@ def get_all_descendants(group_name, children_map, visited=None):
 # ----------------------------------------------------------
 
 
-def analyze_ledgers(ledgers, groups):
-    children_map = build_group_hierarchy(groups)
+def analyze_ledgers(ledgers, groups, children_map=None):
+    if children_map is None:
+        children_map = build_group_hierarchy(groups)
     
     # Initialize DB if possible
     if database_manager:
@@ -228,32 +278,24 @@ def analyze_ledgers(ledgers, groups):
     sc = {"Sundry Creditors"}
     sc.update(get_all_descendants("Sundry Creditors", children_map))
 
+    # One dict probe per ledger instead of two set probes
+    # (debtors applied last so they win, matching the old if/elif order)
+    parent_type = {p: "vendor" for p in sc}
+    parent_type.update({p: "customer" for p in sd})
+
     sundry_debtors = []
     sundry_creditors = []
     other_ledgers = []
+    buckets = {"customer": sundry_debtors, "vendor": sundry_creditors, "other": other_ledgers}
+    db_rows = []
 
     for ledger in ledgers:
-        parent = ledger["parent"]
-        ledger_type = "other"
-
-        if parent in sd:
-            ledger_type = "customer"
-            sundry_debtors.append(ledger)
-
-        elif parent in sc:
-            ledger_type = "vendor"
-            sundry_creditors.append(ledger)
-
-        else:
-            other_ledgers.append(ledger)
-        
+        ledger_type = parent_type.get(ledger["parent"], "other")
+        buckets[ledger_type].append(ledger)
         ledger["type"] = ledger_type
 
-        # ------------------------------------------------
-        # SAVE TO SQLITE
-        # ------------------------------------------------
         if database_manager:
-            db_data = {
+            db_rows.append({
                 "name": ledger["name"],
                 "parent": ledger["parent"],
                 "type": ledger_type,
@@ -268,8 +310,13 @@ def analyze_ledgers(ledgers, groups):
                 "pan": ledger.get("pan", ""),
                 "opening_balance": ledger.get("opening_balance", 0) or 0,
                 "closing_balance": ledger.get("closing_balance", 0) or 0
-            }
-            database_manager.insert_or_update_ledger(db_data)
+            })
+
+    # ------------------------------------------------
+    # SAVE TO SQLITE (single executemany)
+    # ------------------------------------------------
+    if database_manager:
+        database_manager.bulk_save_ledgers(db_rows)
 
     return {
         "ledgers": ledgers,
@@ -301,7 +348,7 @@ def search_ledger(query, ledgers):
         print(f"🏷️ LEDGER TYPE    : {l['type']}")
 
         print("📨 ADDRESS:")
-        for line in l["address_lines"]:
+        for line in l.get("address", "").splitlines():
             print(f"   {line}")
 
         print(f"🌍 STATE          : {l.get('state','')}")
@@ -374,8 +421,9 @@ except ImportError:
 
 def analyze_ledgers_and_groups():
     """Wrapper function for API to get all data"""
-    # 1. Fetch Groups
-    groups = fetch_groups_from_tally()
+    # 1. Fetch Groups (hierarchy is built during the same parse)
+    children_map = defaultdict(list)
+    groups = fetch_groups_from_tally(children_map=children_map)
     
     # 2. Fetch Ledgers
     ledgers = fetch_ledgers_from_tally()
@@ -392,8 +440,8 @@ def analyze_ledgers_and_groups():
     
     if not ledgers: return None
     
-    analysis = analyze_ledgers(ledgers, groups)
-    children_map = build_group_hierarchy(groups)
+    # Share the hierarchy with the classifier
+    analysis = analyze_ledgers(ledgers, groups, children_map=children_map)
     
     return {
         "ledgers": analysis["ledgers"],
@@ -555,8 +603,27 @@ def sync_groups_to_zoho(mapping=None):
     # PHASE 2: Sync CHILD Groups (Sub-Accounts) 
     # ---------------------------------------------------------
     print(f"🔹 PHASE 2: Syncing Child Groups under Mapped Parents...")
+
+    # Walk the hierarchy breadth-first from the mapped parents so every
+    # group is reached only after its own parent has been created/linked
+    group_children = build_group_hierarchy(tally_groups)
+    group_by_name = {g["name"]: g for g in tally_groups}
+    ordered_groups = []
+    emitted = set()
+    expanded = set()
+    queue = deque(valid_parents)
+    while queue:
+        parent_name = queue.popleft()
+        if parent_name in expanded:
+            continue
+        expanded.add(parent_name)
+        for child_name in group_children.get(parent_name, ()):
+            if child_name not in emitted:
+                emitted.add(child_name)
+                ordered_groups.append(group_by_name[child_name])
+                queue.append(child_name)
     
-    for grp in tally_groups:
+    for grp in ordered_groups:
         tally_name = grp["name"]
         tally_parent = grp["parent"] # The immediate parent in Tally
         
@@ -739,6 +806,15 @@ def create_standalone_account(ledger_name, account_type):
         return "overseas"
     return "business_none" # Default
 
+# Concurrent POST /contacts requests during ledger sync
+CONTACT_SYNC_WORKERS = 4
+
+# Most contact pages in flight at once while pre-loading existing Zoho contacts
+PRELOAD_PAGE_WINDOW = 10
+
+# Ledger fields copied into the contact payload, in the order they are unpacked
+_CONTACT_FIELDS = ("address", "state", "pincode", "country", "email", "phone")
+
 def sync_ledgers_to_zoho(selected_ledgers=None, contact_type_filter=None):  # OPTIMISED
     """
     Syncs ledgers to Zoho Books as Contacts.
@@ -803,74 +879,106 @@ def sync_ledgers_to_zoho(selected_ledgers=None, contact_type_filter=None):  # OP
     # replaces them with ~5-10 paginated GETs total.
     # ─────────────────────────────────────────────────────────────────────────
     print("📥 Pre-loading existing Zoho contacts (bulk fetch — this may take a moment)...")
-    existing_contacts = {}   # key: contact_name.lower() -> contact dict
+    existing_keys = set()    # contact_name.lower() — only the key is needed for the existence check
     per_page = 200           # Zoho max per page
 
     # Pre-load only the contact type(s) we will sync
     types_to_preload = [contact_type_filter] if contact_type_filter else ["customer", "vendor"]
 
-    for ctype in types_to_preload:
-        page = 1
-        while True:
-            res = zoho.api_call("GET", "/contacts", params={
-                "contact_type": ctype,
-                "page": page,
-                "per_page": per_page
-            })
-            if res.get("code") != 0:
-                print(f"⚠️ Could not pre-load {ctype} contacts page {page}: {res.get('message')}")
-                break
-
-            contacts_page = res.get("contacts", [])
-            for c in contacts_page:
-                key = c["contact_name"].lower().strip()
-                existing_contacts[key] = c
-
-            has_more = res.get("page_context", {}).get("has_more_page", False)
-            print(f"   📄 Loaded {ctype} page {page} — {len(contacts_page)} contacts (has_more={has_more})")
-            if not has_more:
-                break
-            page += 1
-
-    print(f"✅ Pre-loaded {len(existing_contacts)} existing Zoho contacts into memory.")
+    def fetch_contacts_page(ctype, page):
+        return zoho.api_call("GET", "/contacts", params={
+            "contact_type": ctype,
+            "page": page,
+            "per_page": per_page
+        })
+
+    # Pages are consumed in order from a sliding window. Page 1 goes alone
+    # (most books fit in one page); after that the window grows with the
+    # number of pages already loaded, up to PRELOAD_PAGE_WINDOW, so a short
+    # book never pays for a full window of pages past its end. Nothing new is
+    # scheduled once a page reports has_more_page=False.
+    with ThreadPoolExecutor(max_workers=PRELOAD_PAGE_WINDOW) as pool:
+        for ctype in types_to_preload:
+            fetch_page = functools.partial(fetch_contacts_page, ctype)
+            in_flight = deque([(1, pool.submit(fetch_page, 1))])
+            next_page, loaded = 2, 0
+            while in_flight:
+                page, future = in_flight.popleft()
+                res = future.result()
+                if res.get("code") != 0:
+                    print(f"⚠️ Could not pre-load {ctype} contacts page {page}: {res.get('message')}")
+                    break
+
+                contacts_page = res.get("contacts", [])
+                existing_keys.update(c["contact_name"].lower().strip() for c in contacts_page)
+                loaded += 1
+
+                has_more = res.get("page_context", {}).get("has_more_page", False)
+                print(f"   📄 Loaded {ctype} page {page} — {len(contacts_page)} contacts (has_more={has_more})")
+                if not has_more:
+                    break
+                while len(in_flight) < min(loaded, PRELOAD_PAGE_WINDOW):
+                    in_flight.append((next_page, pool.submit(fetch_page, next_page)))
+                    next_page += 1
+            # Pages past the end (or past a failed page) that haven't started
+            for _, future in in_flight:
+                future.cancel()
+
+    print(f"✅ Pre-loaded {len(existing_keys)} existing Zoho contacts into memory.")
 
     # ─────────────────────────────────────────────────────────────────────────
-    # MAIN SYNC LOOP — uses local map for existence check (zero extra GETs)
+    # BUILD PAYLOADS — uses local map for existence check (zero extra GETs)
     # ─────────────────────────────────────────────────────────────────────────
     stats = {"created": 0, "updated": 0, "failed": 0, "skipped": 0}
     failed_names = []  # track which contacts failed for frontend display
-    total = len(ledgers_to_sync)
-
-    def clean(val): return (val or "").replace("\r", "").replace("\n", "").strip()
 
-    for idx, l in enumerate(ledgers_to_sync, 1):
-        # Strip \r \n and extra whitespace — Tally data often has carriage returns embedded
-        name = l["name"].replace("\r", "").replace("\n", "").strip()
-        name_key = name.lower()
-
-        # Progress log every 50 records
-        if idx % 50 == 0 or idx == 1 or idx == total:
-            print(f"   🔄 Progress: {idx}/{total} | created={stats['created']} skipped={stats['skipped']} failed={stats['failed']}")
+    def clean(val): return (val or "").translate(_NL_TABLE).strip()
+
+    pending = []  # (name, contact_type, ledger) — contacts not yet in Zoho
+    for l in ledgers_to_sync:
+        # Ledgers from fetch_ledgers_from_tally arrive pre-normalised with a
+        # name_key; DB rows and caller-supplied ledgers don't, so clean those.
+        # (Tally data often has carriage returns embedded in names.)
+        name_key = l.get("name_key")
+        if name_key is None:
+            name = clean(l["name"])
+            name_key = name.lower()
+        else:
+            name = l["name"]
 
         # Determine contact type — use the ledger's own type field
         contact_type = "customer"
         if l.get("type") == "vendor":
             contact_type = "vendor"
 
-        # LOCAL existence check — no API call needed
-        if name_key in existing_contacts:
+        # LOCAL existence check — no API call needed. Names queued earlier in
+        # this run are added too, so intra-run duplicates are also caught.
+        if name_key in existing_keys:
             stats["skipped"] += 1
-            continue  # Already in Zoho, skip silently (uncomment print below if needed)
-            # print(f"⏭️  Skipped (already exists): {name}")
+            continue  # Already in Zoho, skip silently
+        existing_keys.add(name_key)
 
-        address_str = clean(l.get("address", ""))
-        city        = ""
-        state       = clean(l.get("state", ""))
-        zip_code    = clean(l.get("pincode", ""))
-        country     = clean(l.get("country", ""))
-        email       = clean(l.get("email", ""))
-        phone       = clean(l.get("phone", ""))  # Tally phone → used as mobile in Zoho
+        pending.append((name, contact_type, l))
 
+    # Clean each payload column in one pass over the pending ledgers only
+    columns = {
+        field: [clean(l.get(field, "")) for _, _, l in pending]
+        for field in _CONTACT_FIELDS
+    }
+    city = ""
+
+    to_create = []  # (name, contact_type, payload)
+    for (name, contact_type, _), address_str, state, zip_code, country, email, phone in zip(
+            pending, *(columns[f] for f in _CONTACT_FIELDS)):
+        # Billing and shipping are identical — build the dict once and share it;
+        # payloads are only serialised, never mutated.
+        address = {
+            "address": address_str,
+            "city":    city,
+            "state":   state,
+            "zip":     zip_code,
+            "country": country
+        }
         payload = {
             "contact_name": name,
             "company_name": name,
@@ -880,20 +988,8 @@ def sync_ledgers_to_zoho(selected_ledgers=None, contact_type_filter=None):  # OP
             "email":  email,
             "phone":  phone,    # Work Phone
             "mobile": phone,    # Mobile (Tally phone is usually mobile)
-            "billing_address": {
-                "address": address_str,
-                "city":    city,
-                "state":   state,
-                "zip":     zip_code,
-                "country": country
-            },
-            "shipping_address": {
-                "address": address_str,
-                "city":    city,
-                "state":   state,
-                "zip":     zip_code,
-                "country": country
-            }
+            "billing_address":  address,
+            "shipping_address": address
         }
 
         # Add contact_persons when email OR phone exists — Zoho Books stores
@@ -911,18 +1007,44 @@ def sync_ledgers_to_zoho(selected_ledgers=None, contact_type_filter=None):  # OP
                 }
             ]
 
-        # CREATE — new contact (no per-vendor search needed)
-        res = zoho.api_call("POST", "/contacts", payload=payload)
-        if res.get("code") == 0:
-            stats["created"] += 1
-            # Add to local map so intra-run duplicates are also caught
-            existing_contacts[name_key] = res.get("contact", {})
-            print(f"✨ Created ({contact_type}): {name}")
-        else:
-            stats["failed"] += 1
-            err_msg = res.get('message', 'Unknown error')
-            failed_names.append({"name": name, "reason": err_msg})
-            print(f"❌ Create Failed {name}: {err_msg}")
+        to_create.append((name, contact_type, payload))
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # CREATE — POSTs run on a small worker pool. The connector still paces
+    # every call (API_CALL_DELAY), so this overlaps network latency without
+    # exceeding the Zoho rate limit.
+    # ─────────────────────────────────────────────────────────────────────────
+    total = len(to_create)
+    print(f"📤 Creating {total} new contact(s) with {CONTACT_SYNC_WORKERS} workers "
+          f"({stats['skipped']} already in Zoho)...")
+
+    def create_contact(payload):
+        return zoho.api_call("POST", "/contacts", payload=payload)
+
+    with ThreadPoolExecutor(max_workers=CONTACT_SYNC_WORKERS) as pool:
+        futures = {
+            pool.submit(create_contact, payload): (name, contact_type)
+            for name, contact_type, payload in to_create
+        }
+        for idx, future in enumerate(as_completed(futures), 1):
+            name, contact_type = futures[future]
+            try:
+                res = future.result()
+            except Exception as e:
+                res = {"code": 1, "message": str(e)}
+
+            if res.get("code") == 0:
+                stats["created"] += 1
+                print(f"✨ Created ({contact_type}): {name}")
+            else:
+                stats["failed"] += 1
+                err_msg = res.get('message', 'Unknown error')
+                failed_names.append({"name": name, "reason": err_msg})
+                print(f"❌ Create Failed {name}: {err_msg}")
+
+            # Progress log every 50 records
+            if idx % 50 == 0 or idx == 1 or idx == total:
+                print(f"   🔄 Progress: {idx}/{total} | created={stats['created']} skipped={stats['skipped']} failed={stats['failed']}")
 
     print(f"\n🏁 Sync Complete — Created: {stats['created']}, Skipped: {stats['skipped']}, Failed: {stats['failed']}")
     return {"status": "success", "stats": stats, "failed_contacts": failed_names}
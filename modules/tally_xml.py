@@ -0,0 +1,84 @@
+import re
+from xml.etree import ElementTree
+
+try:
+    from lxml import etree
+except ImportError:
+    print("⚠️ Warning: lxml not installed. Falling back to the stdlib (expat) XML parser.")
+    etree = None
+
+# ----------------------------------------------------------
+# STREAMING TALLY EXPORTS
+# ----------------------------------------------------------
+
+def iter_tally_elements(response, tag):
+    """
+    Stream <TAG> elements (VOUCHER, LEDGER, GROUP, ...) out of a Tally export
+    as they arrive. `response` is a requests response opened with stream=True.
+    Each element is cleared (with its already-seen siblings) once the caller
+    moves on, so memory stays flat regardless of export size.
+
+    An empty export (e.g. no vouchers in the requested range) has no root
+    element at all and simply yields nothing instead of raising.
+    """
+    if etree is None:
+        yield from _iter_tally_elements_stdlib(response, tag)
+        return
+
+    response.raw.decode_content = True
+    context = etree.iterparse(response.raw, events=("end",), tag=tag,
+                              recover=True, huge_tree=True)
+    try:
+        for _, elem in context:
+            yield elem
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+    except etree.XMLSyntaxError:
+        if context.root is not None:
+            raise
+
+
+# Character references Tally emits that are not legal XML 1.0 (e.g. &#4;)
+_INVALID_XML_CHARREF = re.compile(
+    rb"&#(?:0*(?:[0-8]|1[124-9]|2[0-9]|3[01])|x0*(?:[0-8bBcCeEfF]|1[0-9a-fA-F]));"
+)
+
+
+def _iter_tally_elements_stdlib(response, tag):
+    """
+    Fallback for iter_tally_elements when lxml is unavailable: the response is
+    fed chunk by chunk into the stdlib expat pull parser. expat has no recover
+    mode, so illegal character references are dropped from each chunk first.
+    """
+    parser = ElementTree.XMLPullParser(events=("start", "end"))
+    started = False
+
+    def matching():
+        nonlocal started
+        for event, elem in parser.read_events():
+            started = True
+            if event == "end" and elem.tag == tag:
+                yield elem
+                elem.clear()
+
+    tail = b""
+    for chunk in response.iter_content(chunk_size=65536):
+        chunk = tail + chunk
+        # Hold back a character reference split across chunks (e.g. "&#" | "4;")
+        cut = chunk.rfind(b"&", max(0, len(chunk) - 10))
+        if cut != -1 and b";" not in chunk[cut:]:
+            chunk, tail = chunk[:cut], chunk[cut:]
+        else:
+            tail = b""
+        parser.feed(_INVALID_XML_CHARREF.sub(b"", chunk))
+        yield from matching()
+
+    parser.feed(_INVALID_XML_CHARREF.sub(b"", tail))
+    try:
+        parser.close()
+    except ElementTree.ParseError:
+        if started:
+            raise
+        return
+    yield from matching()
@@ -1,19 +1,33 @@
 import requests
+from requests.adapters import HTTPAdapter
 import os
 import time
 import sys
+import threading
+import json
 from dotenv import load_dotenv
 
+try:
+    import orjson  # optional — much faster JSON encode/decode for bulk syncs
+except ImportError:
+    orjson = None
+
 # Explicitly load .env from the project root (one level up from modules/)
 _project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 _env_path = os.path.join(_project_root, ".env")
 load_dotenv(_env_path)
 
 # ── Rate limit settings ──────────────────────────────────────────────────────
-API_CALL_DELAY   = 0.4   # seconds between every API call (~150 calls/min max)
+# seconds between every API call (~150 calls/min max); ZOHO_API_CALL_DELAY=0
+# in .env disables the throttle
+API_CALL_DELAY   = max(0.0, float(os.getenv("ZOHO_API_CALL_DELAY") or 0.4))
 RATE_LIMIT_BACKOFF = 15  # seconds to wait on 429 error
 MAX_RETRIES      = 3     # retry attempts for rate-limited calls
 
+# Zoho JSON codes for an expired / invalid / unauthorised token; same meaning
+# as in the purchase order backend
+AUTH_ERROR_CODES = (14, 57)
+
 # ── Credentials (loaded from .env) ──────────────────────────────────────────
 _CREDS = {
     "client_id":     os.getenv("CLIENT_ID"),
@@ -26,6 +40,14 @@ _CREDS = {
 BASE_URL = "https://www.zohoapis.com/books/v3"
 
 
+def _json_dumps(obj):
+    return orjson.dumps(obj) if orjson else json.dumps(obj).encode("utf-8")
+
+
+def _json_loads(raw):
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+
 class ZohoConnector:
     def __init__(self):
         self.client_id     = _CREDS.get("client_id")
@@ -35,14 +57,39 @@ class ZohoConnector:
         self.auth_url      = _CREDS.get("auth_url",
                                         "https://accounts.zoho.com/oauth/v2/token")
         self.access_token    = None
-        self.token_expiry    = 0
+        # (token, headers, expiry) swapped in as one value, so a thread never
+        # pairs a valid token check with headers another thread just cleared
+        self._auth           = None
         self._last_call_time = 0
+        # Calls may come from several sync worker threads at once
+        self._throttle_lock  = threading.Lock()
+        self._token_lock     = threading.Lock()
+        # One pooled session so HTTPS connections are kept alive between calls
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=4,
+                                                   pool_maxsize=8,
+                                                   max_retries=0))
+
+    def _get_auth(self):
+        """Returns the current (token, headers, expiry), refreshing if expired."""
+        auth = self._auth
+        if auth and time.monotonic() < auth[2]:
+            return auth
+
+        with self._token_lock:
+            # Another thread may have refreshed while we waited for the lock
+            auth = self._auth
+            if auth and time.monotonic() < auth[2]:
+                return auth
+            self._refresh_access_token()
+            return self._auth
 
     def get_access_token(self):
         """Returns a valid access token, refreshing if expired."""
-        if self.access_token and time.time() < self.token_expiry:
-            return self.access_token
+        auth = self._get_auth()
+        return auth[0] if auth else None
 
+    def _refresh_access_token(self):
         if not self.client_id or not self.client_secret or not self.refresh_token:
             print("❌ Missing credentials — check zoho_creatials.py")
             print(f"   client_id     : {self.client_id}")
@@ -61,13 +108,19 @@ class ZohoConnector:
 
         for attempt in range(1, 4):
             try:
-                resp = requests.post(self.auth_url, data=params, timeout=15)
+                resp = self.session.post(self.auth_url, data=params, timeout=15)
                 data = resp.json()
                 if "access_token" in data:
-                    self.access_token = data["access_token"]
-                    self.token_expiry = time.time() + (data.get("expires_in", 3600) - 60)
+                    token = data["access_token"]
+                    headers = {
+                        "Authorization": f"Zoho-oauthtoken {token}",
+                        "Content-Type":  "application/json"
+                    }
+                    expiry = time.monotonic() + (data.get("expires_in", 3600) - 60)
+                    self._auth = (token, headers, expiry)
+                    self.access_token = token
                     print("✅ Access Token Refreshed")
-                    return self.access_token
+                    return token
                 else:
                     print(f"❌ Failed to refresh token (attempt {attempt}): {data}")
                     if attempt < 3:
@@ -81,25 +134,23 @@ class ZohoConnector:
         return None
 
     def get_headers(self):
-        token = self.get_access_token()
-        if not token:
-            return None
-        return {
-            "Authorization": f"Zoho-oauthtoken {token}",
-            "Content-Type":  "application/json"
-        }
+        auth = self._get_auth()
+        return auth[1] if auth else None
 
     def _throttle(self):
         """Enforce minimum gap between API calls to avoid rate limiting."""
-        elapsed = time.time() - self._last_call_time
-        if elapsed < API_CALL_DELAY:
-            time.sleep(API_CALL_DELAY - elapsed)
-        self._last_call_time = time.time()
+        if API_CALL_DELAY <= 0:
+            return
+        with self._throttle_lock:
+            elapsed = time.monotonic() - self._last_call_time
+            if elapsed < API_CALL_DELAY:
+                time.sleep(API_CALL_DELAY - elapsed)
+            self._last_call_time = time.monotonic()
 
     def api_call(self, method, endpoint, payload=None, params=None):
         """
         Makes a Zoho Books API call with:
-        - Throttling  : 0.4s minimum gap between calls
+        - Throttling  : API_CALL_DELAY minimum gap between calls
         - Retry       : up to 3 retries on 429 / rate-limit responses
         - Token refresh: auto re-fetches token if it expires mid-sync
         """
@@ -107,6 +158,7 @@ class ZohoConnector:
         if not params:
             params = {}
         params["organization_id"] = self.org_id
+        body = _json_dumps(payload) if payload is not None else None
 
         for attempt in range(1, MAX_RETRIES + 1):
             self._throttle()
@@ -117,11 +169,11 @@ class ZohoConnector:
 
             try:
                 if method == "GET":
-                    resp = requests.get(url, headers=headers, params=params, timeout=30)
+                    resp = self.session.get(url, headers=headers, params=params, timeout=30)
                 elif method == "POST":
-                    resp = requests.post(url, headers=headers, params=params, json=payload, timeout=30)
+                    resp = self.session.post(url, headers=headers, params=params, data=body, timeout=30)
                 elif method == "PUT":
-                    resp = requests.put(url, headers=headers, params=params, json=payload, timeout=30)
+                    resp = self.session.put(url, headers=headers, params=params, data=body, timeout=30)
                 else:
                     return {"code": 1, "message": f"Unknown method: {method}"}
 
@@ -132,20 +184,20 @@ class ZohoConnector:
                     time.sleep(wait)
                     continue
 
-                result = resp.json()
+                result = _json_loads(resp.content)
 
                 # Zoho JSON rate-limit codes
-                if result.get("code") in (429, 57, 58):
+                if result.get("code") in (429, 58):
                     wait = RATE_LIMIT_BACKOFF * attempt
                     print(f"⚠️ Zoho rate limit code {result.get('code')}. Waiting {wait}s...")
                     time.sleep(wait)
                     continue
 
                 # Auth expired mid-session → force refresh and retry
-                if result.get("code") == 14 or "invalid_token" in str(result.get("message", "")):
+                if result.get("code") in AUTH_ERROR_CODES or "invalid_token" in str(result.get("message", "")):
                     print("🔄 Auth expired mid-session, refreshing token...")
+                    self._auth = None
                     self.access_token = None
-                    self.token_expiry = 0
                     continue
 
                 return result
@@ -258,7 +258,7 @@ def sync_purchase_orders_to_zoho(selected_orders=None, from_date="20250401", to_
         contact_map = get_zoho_contacts(token)
         account_map = get_zoho_accounts(token)
         payment_terms_map = get_zoho_payment_terms_list(token)
-        tax_map = get_zoho_taxes(token)
+        tax_map = get_zoho_tax_index(token)
         tag_map = get_zoho_tags(token)
         item_map = get_zoho_items(token)
         
@@ -1,15 +1,36 @@
 import os
+import sys
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
 from collections import defaultdict
 from dotenv import load_dotenv
 import json
 import re
-from fuzzywuzzy import fuzz
+import time
+import logging
+import functools
+import dbm
+import shelve
+import threading
+from math import fsum
+from operator import itemgetter
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from lxml import etree
+from rapidfuzz import fuzz, process
+from xml.sax.saxutils import escape as xml_escape
+
+# Project root on the path for the shared modules/ helpers
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.tally_xml import iter_tally_elements
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 TALLY_URL = "http://localhost:9000"
 BASE_URL = "https://www.zohoapis.in/books/v3"
 CLIENT_ID = os.getenv("CLIENT_ID")
@@ -17,9 +38,240 @@ CLIENT_SECRET = os.getenv("CLIENT_SECRET")
 REFRESH_TOKEN = os.getenv("REFRESH_TOKEN")
 ORGANIZATION_ID = os.getenv("ORGANIZATION_ID")
 
+# Concurrent POST /purchaseorders requests during sync
+PO_SYNC_WORKERS = 4
+
+# Concurrent GETs while loading Zoho lookup data (tag details, pages)
+ZOHO_LOOKUP_WORKERS = 4
+
+# Zoho caps concurrent calls per organisation (5 on the Free plan). The six
+# lookups and their page / tag-detail pools all share these slots, so no more
+# than this many lookup GETs are ever in flight at once.
+ZOHO_MAX_CONCURRENT_CALLS = 4
+_ZOHO_CALL_SLOTS = threading.BoundedSemaphore(ZOHO_MAX_CONCURRENT_CALLS)
+
+# A lookup GET answered with 429 is retried this many times, waiting
+# Retry-After (or 1s, 2s, 4s...) between attempts
+ZOHO_RATE_LIMIT_RETRIES = 3
+
+# Print every full PO payload before it is posted (slow on big syncs)
+DEBUG_PAYLOAD = False
+
+# purchaseorder_response.log is rewritten by each sync worker
+_RESPONSE_LOG_LOCK = threading.Lock()
+
+# Pooled HTTP sessions so Tally and Zoho connections are kept alive between
+# calls (Zoho pages otherwise pay a TLS handshake each)
+_TALLY_SESSION = requests.Session()
+_ZOHO_SESSION = requests.Session()
+# Only failed connects are retried: a retried read could post a PO twice
+_ZOHO_SESSION.mount("https://", HTTPAdapter(pool_connections=4,
+                                            pool_maxsize=8,
+                                            max_retries=Retry(total=3, connect=3, read=0,
+                                                              status=0, backoff_factor=0.3)))
+
 # Cache for vendor payment terms to avoid repeated queries
 vendor_payment_terms_cache = {}
 
+# How long Zoho / Tally master lookups are reused between syncs (seconds)
+ZOHO_LOOKUP_TTL = 300
+TALLY_LEDGER_MAP_TTL = 600
+# Zoho access tokens live 3600s; reuse one for a little less than that
+ZOHO_TOKEN_TTL = 3300
+
+# On-disk copy of the Zoho lookups (never the access token), so back-to-back
+# runs of the script skip the lookup downloads. It lives in the user's cache
+# directory, readable by the owner only. Entries are keyed by organisation and
+# expire on the same TTL as the in-memory cache.
+ZOHO_CACHE_DIR = os.path.join(os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                              "tally-zoho-migration")
+ZOHO_CACHE_FILE = os.path.join(ZOHO_CACHE_DIR, "zoho_lookups")
+_ZOHO_CACHE_LOCK = threading.Lock()
+
+def _open_disk_cache():
+    """Open ZOHO_CACHE_FILE, creating it (and its directory) owner-only"""
+    os.makedirs(ZOHO_CACHE_DIR, mode=0o700, exist_ok=True)
+    return shelve.Shelf(dbm.open(ZOHO_CACHE_FILE, "c", 0o600))
+
+def _disk_cache_get(key, ttl_seconds):
+    """Return (age, value) for a fresh on-disk entry, or None"""
+    try:
+        with _ZOHO_CACHE_LOCK, _open_disk_cache() as db:
+            hit = db.get(f"{ORGANIZATION_ID}:{key}")
+    except Exception as e:
+        logger.warning("Could not read %s: %s", ZOHO_CACHE_FILE, e)
+        return None
+    if hit is None:
+        return None
+    age = time.time() - hit[0]
+    return (age, hit[1]) if 0 <= age < ttl_seconds else None
+
+def _disk_cache_set(key, value):
+    try:
+        with _ZOHO_CACHE_LOCK, _open_disk_cache() as db:
+            if value is None:
+                db.pop(f"{ORGANIZATION_ID}:{key}", None)
+            else:
+                db[f"{ORGANIZATION_ID}:{key}"] = (time.time(), value)
+    except Exception as e:
+        logger.warning("Could not write %s: %s", ZOHO_CACHE_FILE, e)
+
+def ttl_cache(ttl_seconds, persist=None):
+    """
+    Reuse a lookup's last successful result for `ttl_seconds`.
+    Arguments are ignored on purpose: the Zoho lookups only take an access
+    token, which changes per sync while the organisation data doesn't.
+    Empty results (failed lookups) are never cached. With `persist` set, the
+    result is also kept in ZOHO_CACHE_FILE under that name. Call
+    `fn.cache_clear()` to force a refresh.
+    """
+    def decorator(fn):
+        cache = {}
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            hit = cache.get("value")
+            if hit is not None and time.monotonic() - hit[0] < ttl_seconds:
+                return hit[1]
+            if persist:
+                stored = _disk_cache_get(persist, ttl_seconds)
+                if stored is not None:
+                    cache["value"] = (time.monotonic() - stored[0], stored[1])
+                    return stored[1]
+            result = fn(*args, **kwargs)
+            if result:
+                cache["value"] = (time.monotonic(), result)
+                if persist:
+                    _disk_cache_set(persist, result)
+            return result
+
+        def cache_clear():
+            cache.clear()
+            if persist:
+                _disk_cache_set(persist, None)
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+# Numeric token in Tally amount/rate text (e.g. "-1234.56", "100.00/Nos")
+_NUM_RE = re.compile(r'[-\d.]+')
+
+def _parse_amt(text):
+    """
+    Parse a Tally amount/rate. Plain numbers ("-1234.56") go straight to
+    float(); "1234.56 Dr" style values are split on whitespace and the last
+    numeric word is used. Only odd formats fall back to the regex scan.
+    """
+    if not text:
+        return 0.0
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    for tok in reversed(text.split()):
+        try:
+            return float(tok)
+        except ValueError:
+            if any(c.isdigit() for c in tok):
+                break
+    numbers = _NUM_RE.findall(text)
+    return float(numbers[-1]) if numbers else 0.0
+
+# Payment-term phrases searched for in purchase order text, tried in order.
+# "N days credit" needs no pattern of its own: "N days" already matches it.
+_PAYMENT_TERM_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'(\d+)\s*days?',
+    r'net\s*(\d+)',
+)]
+
+# Free-text voucher fields where payment terms are written by hand
+_XP_TERMS_TEXT = etree.XPath('.//NARRATION/text() | .//REFERENCE/text() | '
+                             './/BASICORDERREF/text() | .//BASICORDERTERMS/text()')
+
+# Day count in a payment-terms string ("30 Days" -> "30")
+_DIGITS_RE = re.compile(r'\d+')
+
+# Zoho payment-term labels that name a day count: "net 30", "30 days", "net30"
+_TERM_DAYS_RE = re.compile(r'net (\d+)$|(\d+) days$|net(\d+)$')
+
+# Precompiled voucher sub-list lookups. The ALL* variants are only used when a
+# voucher has no plain entries, so callers write `_XP_INV(v) or _XP_ALLINV(v)`.
+_XP_INV = etree.XPath('.//INVENTORYENTRIES.LIST')
+_XP_ALLINV = etree.XPath('.//ALLINVENTORYENTRIES.LIST')
+_XP_LED = etree.XPath('.//LEDGERENTRIES.LIST')
+_XP_ALLLED = etree.XPath('.//ALLLEDGERENTRIES.LIST')
+
+# Address line text under a <BASICBUYERADDRESS.LIST>
+_XP_ADDR = etree.XPath('.//BASICBUYERADDRESS/text()')
+# ...and under a voucher's first address list, in one call
+_XP_VOUCHER_ADDR = etree.XPath('(.//BASICBUYERADDRESS.LIST)[1]//BASICBUYERADDRESS/text()')
+
+# Reporting tags of an inventory entry: the first CATEGORY, and the first cost
+# centre NAME, inside its first CATEGORYALLOCATIONS.LIST ("" when absent)
+_XP_ITEM_CATEGORY = etree.XPath(
+    'string((.//CATEGORYALLOCATIONS.LIST)[1]/descendant::CATEGORY[1])',
+    smart_strings=False)
+_XP_ITEM_COST_CENTRE = etree.XPath(
+    'string((.//CATEGORYALLOCATIONS.LIST)[1]'
+    '/descendant::COSTCENTREALLOCATIONS.LIST[1]/descendant::NAME[1])',
+    smart_strings=False)
+
+# Tax / rounding-off ledger names, told apart with a single scan of the name
+_LEDGER_KIND_RE = re.compile(r'(cgst|sgst|igst|rounding)', re.IGNORECASE)
+
+# Tax rate in a ledger name, e.g. "18" from "CGST Output 18%" or "9" from "CGST@9 %"
+_RATE_RE = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+
+# Single-value voucher fields, read off the <VOUCHER> children when present
+_SCALAR_TAGS = frozenset(('DATE', 'VOUCHERNUMBER', 'PARTYNAME', 'NARRATION',
+                          'REFERENCE', 'ORDERSTATUS'))
+
+def _order_status(voucher):
+    """ORDERSTATUS text, "Pending" when the tag is missing (an empty tag reads as "")"""
+    status = voucher.findtext('.//ORDERSTATUS')
+    return "Pending" if status is None else status
+
+# Per-tag readers for the scalar fields; string() gives "" for a missing tag
+_XP_SCALARS = {t: etree.XPath(f'string(.//{t})', smart_strings=False) for t in _SCALAR_TAGS}
+_XP_SCALARS['ORDERSTATUS'] = _order_status
+
+# What a streamed Tally export can fail with: connection errors up front
+# (requests), a dropped connection mid-stream (urllib3) or unparseable XML
+_TALLY_READ_ERRORS = (requests.RequestException, Urllib3HTTPError, etree.LxmlError)
+
+def iter_tally_vouchers(response):
+    """Stream <VOUCHER> elements out of a Tally voucher export"""
+    return iter_tally_elements(response, "VOUCHER")
+
+@ttl_cache(TALLY_LEDGER_MAP_TTL)
+def get_ledger_credit_periods():
+    """
+    Index every Tally ledger's credit period by lowercased name, from a single
+    ledger master export. CREDITPERIOD wins over BILLCREDITPERIOD; ledgers
+    with neither map to "". Returns {} (which is not cached) if the export
+    fails, rather than a partial index.
+    """
+    ledger_xml = """<ENVELOPE><HEADER><TALLYREQUEST>Export Data</TALLYREQUEST></HEADER>
+    <BODY><EXPORTDATA><REQUESTDESC><REPORTNAME>List of Ledgers</REPORTNAME>
+    <STATICVARIABLES><SVEXPORTFORMAT>$$SysName:XML</SVEXPORTFORMAT></STATICVARIABLES>
+    </REQUESTDESC></EXPORTDATA></BODY></ENVELOPE>"""
+    
+    index = {}
+    try:
+        res = _TALLY_SESSION.post(TALLY_URL, data=ledger_xml, timeout=15, stream=True)
+        for ledger in iter_tally_elements(res, 'LEDGER'):
+            name = ledger.get('NAME', '').strip().lower()
+            terms = (ledger.findtext('.//CREDITPERIOD')
+                     or ledger.findtext('.//BILLCREDITPERIOD')
+                     or "")
+            # First ledger with a given name wins, as in a linear search
+            index.setdefault(name, terms.strip())
+    except _TALLY_READ_ERRORS as e:
+        logger.warning("Could not read ledger credit periods from Tally: %s", e)
+        return {}
+    return index
+
 def fetch_vendor_payment_terms(vendor_name):
     """Fetch payment terms from vendor ledger master in Tally"""
     if not vendor_name:
@@ -29,40 +281,12 @@ def fetch_vendor_payment_terms(vendor_name):
     if vendor_name in vendor_payment_terms_cache:
         return vendor_payment_terms_cache[vendor_name]
     
-    # XML request to fetch specific ledger details
-    ledger_xml = f"""<ENVELOPE><HEADER><TALLYREQUEST>Export Data</TALLYREQUEST></HEADER>
-    <BODY><EXPORTDATA><REQUESTDESC><REPORTNAME>List of Ledgers</REPORTNAME>
-    <STATICVARIABLES><SVEXPORTFORMAT>$$SysName:XML</SVEXPORTFORMAT></STATICVARIABLES>
-    </REQUESTDESC></EXPORTDATA></BODY></ENVELOPE>"""
-    
-    try:
-        res = requests.post(TALLY_URL, data=ledger_xml, timeout=15)
-        soup = BeautifulSoup(res.content, 'lxml-xml')
-        
-        # Find the specific vendor ledger
-        for ledger in soup.find_all('LEDGER'):
-            name = ledger.get('NAME', '').strip()
-            if name.lower() == vendor_name.lower():
-                # Check for CREDITPERIOD field
-                credit_period = ledger.find('CREDITPERIOD')
-                if credit_period and credit_period.text:
-                    terms = credit_period.text.strip()
-                    vendor_payment_terms_cache[vendor_name] = terms
-                    return terms
-                
-                # Alternative: Check for BILLCREDITPERIOD in ledger
-                bill_credit = ledger.find('BILLCREDITPERIOD')
-                if bill_credit and bill_credit.text:
-                    terms = bill_credit.text.strip()
-                    vendor_payment_terms_cache[vendor_name] = terms
-                    return terms
-                
-                break
-    except:
-        pass
-    
-    vendor_payment_terms_cache[vendor_name] = ""
-    return ""
+    credit_periods = get_ledger_credit_periods()
+    terms = credit_periods.get(vendor_name.lower(), "")
+    # Only remember the answer if the ledger export actually succeeded
+    if credit_periods:
+        vendor_payment_terms_cache[vendor_name] = terms
+    return terms
 
 def get_payment_terms_hierarchical(voucher, party_name):
     """
@@ -73,27 +297,22 @@ def get_payment_terms_hierarchical(voucher, party_name):
     4. Fetch from vendor ledger master (CREDITPERIOD field)
     """
     # Method 1: Check BILLALLOCATIONS.LIST → BILLCREDITPERIOD
-    bill_alloc = voucher.find('BILLALLOCATIONS.LIST')
-    if bill_alloc:
-        bill_credit = bill_alloc.find('BILLCREDITPERIOD')
-        if bill_credit and bill_credit.text:
+    bill_alloc = voucher.find('.//BILLALLOCATIONS.LIST')
+    if bill_alloc is not None:
+        bill_credit = bill_alloc.find('.//BILLCREDITPERIOD')
+        if bill_credit is not None and bill_credit.text:
             return bill_credit.text.strip()
     
     # Method 2: Check BASICDUEDATEOFPYMT
-    due_date = voucher.find('BASICDUEDATEOFPYMT')
-    if due_date and due_date.text:
+    due_date = voucher.find('.//BASICDUEDATEOFPYMT')
+    if due_date is not None and due_date.text:
         return due_date.text.strip()
     
-    # Method 3: Search for payment term patterns in entire Purchase Order text
-    voucher_text = str(voucher)
-    patterns = [
-        r'(\d+)\s*days?',
-        r'net\s*(\d+)',
-        r'(\d+)\s*days?\s*credit',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, voucher_text, re.IGNORECASE)
+    # Method 3: Search for payment term patterns in the PO's free-text fields
+    # (narration, references, order terms) rather than the serialized voucher
+    voucher_text = " ".join(_XP_TERMS_TEXT(voucher))
+    for pattern in _PAYMENT_TERM_PATTERNS:
+        match = pattern.search(voucher_text)
         if match:
             days = match.group(1)
             return f"{days} Days"
@@ -105,8 +324,13 @@ def get_payment_terms_hierarchical(voucher, party_name):
     
     return ""
 
+@ttl_cache(TALLY_LEDGER_MAP_TTL)
 def get_ledger_map_from_tally():
-    """Builds a map that traces custom groups back to Sundry Creditors (Vendors)."""
+    """
+    Builds a map that traces custom groups back to Sundry Creditors (Vendors).
+    Returns {} (which is not cached) if either Tally export fails: without the
+    group tree every sub-group vendor would be classed "(others)".
+    """
     group_xml = """<ENVELOPE><HEADER><TALLYREQUEST>Export Data</TALLYREQUEST></HEADER>
     <BODY><EXPORTDATA><REQUESTDESC><REPORTNAME>List of Accounts</REPORTNAME>
     <STATICVARIABLES><ACCOUNTTYPE>Groups</ACCOUNTTYPE><SVEXPORTFORMAT>$$SysName:XML</SVEXPORTFORMAT></STATICVARIABLES>
@@ -114,22 +338,25 @@ def get_ledger_map_from_tally():
     
     children_map = defaultdict(list)
     try:
-        res = requests.post(TALLY_URL, data=group_xml, timeout=15)
-        soup = BeautifulSoup(res.content, 'lxml-xml')
-        for g in soup.find_all('GROUP'):
+        res = _TALLY_SESSION.post(TALLY_URL, data=group_xml, timeout=15, stream=True)
+        for g in iter_tally_elements(res, 'GROUP'):
             name = g.get('NAME', '').strip()
-            parent = g.find('PARENT').text.strip() if g.find('PARENT') else ""
+            parent = g.findtext('.//PARENT', "").strip()
             if name: children_map[parent].append(name)
-    except: pass
+    except _TALLY_READ_ERRORS as e:
+        logger.warning("Could not read the group tree from Tally: %s", e)
+        return {}
 
-    def get_all_subgroups(group_name, visited=None):
-        if visited is None: visited = set()
-        if group_name in visited: return set()
-        visited.add(group_name)
-        results = {group_name}
-        for child in children_map.get(group_name, []):
-            results.update(get_all_subgroups(child, visited))
-        return results
+    def get_all_subgroups(group_name):
+        # Iterative walk: no recursion limit on deep group trees
+        seen = {group_name}
+        stack = [group_name]
+        while stack:
+            for child in children_map.get(stack.pop(), ()):
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        return seen
 
     creditor_groups = get_all_subgroups("Sundry Creditors")
 
@@ -140,22 +367,33 @@ def get_ledger_map_from_tally():
     
     l_map = {}
     try:
-        res = requests.post(TALLY_URL, data=ledger_xml, timeout=15)
-        soup = BeautifulSoup(res.content, 'lxml-xml')
-        for l in soup.find_all('LEDGER'):
+        res = _TALLY_SESSION.post(TALLY_URL, data=ledger_xml, timeout=15, stream=True)
+        for l in iter_tally_elements(res, 'LEDGER'):
             name = l.get('NAME', '').strip()
-            parent = l.find('PARENT').text.strip() if l.find('PARENT') else ""
+            parent = l.findtext('.//PARENT', "").strip()
             if parent in creditor_groups: l_map[name] = "(vendors)"
             else: l_map[name] = "(others)"
-    except: pass
+    except _TALLY_READ_ERRORS as e:
+        logger.warning("Could not read ledgers from Tally: %s", e)
+        return {}
     return l_map
 
 def fetch_tally_purchase_orders(purchase_order_number="1"):
     """Fetch a specific Purchase Order by voucher number from Tally"""
-    ledger_map = get_ledger_map_from_tally()
-    
-    print(f"[TALLY] Fetching Purchase Order with voucher number: {purchase_order_number}...")
-    
+    logger.info("[TALLY] Fetching Purchase Order with voucher number: %s...", purchase_order_number)
+    
+    # Ask Tally for just this voucher first; Voucher Register has no
+    # voucher-number filter, so the full register is only scanned as a fallback
+    tdl_number = purchase_order_number.replace('"', '')
+    filtered_request = f"""<ENVELOPE><HEADER><VERSION>1</VERSION><TALLYREQUEST>Export</TALLYREQUEST>
+    <TYPE>Collection</TYPE><ID>PurchaseOrderByNumber</ID></HEADER>
+    <BODY><DESC><STATICVARIABLES><SVEXPORTFORMAT>$$SysName:XML</SVEXPORTFORMAT></STATICVARIABLES>
+    <TDL><TDLMESSAGE>
+    <COLLECTION NAME="PurchaseOrderByNumber" ISMODIFY="No" ISFIXED="No" ISINITIALIZE="No" ISOPTION="No" ISINTERNAL="No">
+    <TYPE>Voucher</TYPE><FETCH>*</FETCH><FILTER>PONumberFilter</FILTER></COLLECTION>
+    <SYSTEM TYPE="Formulae" NAME="PONumberFilter">$VoucherTypeName = "Purchase Order" AND $VoucherNumber = "{xml_escape(tdl_number)}"</SYSTEM>
+    </TDLMESSAGE></TDL></DESC></BODY></ENVELOPE>"""
+
     # Fetch all Purchase Orders without date restriction to find the specific PO
     xml_request = """<ENVELOPE><HEADER><TALLYREQUEST>Export Data</TALLYREQUEST></HEADER>
     <BODY><EXPORTDATA><REQUESTDESC><REPORTNAME>Voucher Register</REPORTNAME>
@@ -163,149 +401,134 @@ def fetch_tally_purchase_orders(purchase_order_number="1"):
     <VOUCHERTYPENAME>Purchase Order</VOUCHERTYPENAME>
     </STATICVARIABLES></REQUESTDESC></EXPORTDATA></BODY></ENVELOPE>"""
 
+    def find_voucher(request_xml):
+        """Stream vouchers and stop parsing at the one with the wanted number"""
+        response = _TALLY_SESSION.post(TALLY_URL, data=request_xml, timeout=30, stream=True)
+        searched = 0
+        sample_numbers = []
+        for v in iter_tally_vouchers(response):
+            searched += 1
+            v_no = (v.findtext('.//VOUCHERNUMBER') or "").strip()
+            if v_no == purchase_order_number:
+                return v, searched, sample_numbers
+            if v_no and len(sample_numbers) < 5:
+                sample_numbers.append(v_no)
+        return None, searched, sample_numbers
+
     try:
-        print(f"[TALLY] Searching for Purchase Order '{purchase_order_number}' in all dates...")
-        response = requests.post(TALLY_URL, data=xml_request, timeout=30)
-        soup = BeautifulSoup(response.content, 'lxml-xml')
-        
-        # Find the specific voucher by number
-        all_vouchers = soup.find_all('VOUCHER')
-        print(f"[TALLY] Total Purchase Order vouchers found: {len(all_vouchers)}")
-        
         vouchers = []
-        for v in all_vouchers:
-            v_no = v.find('VOUCHERNUMBER')
-            if v_no and v_no.text.strip() == purchase_order_number:
-                vouchers.append(v)
-                print(f"[TALLY] ✓ Found Purchase Order #{purchase_order_number}")
-                break
+        try:
+            found, searched, sample_numbers = find_voucher(filtered_request)
+        except Exception as e:
+            logger.warning("[TALLY] Filtered lookup failed (%s), scanning all Purchase Orders...", e)
+            found = None
+        if found is None:
+            logger.info("[TALLY] Searching for Purchase Order '%s' in all dates...", purchase_order_number)
+            found, searched, sample_numbers = find_voucher(xml_request)
+        if found is not None:
+            vouchers.append(found)
+            logger.info("[TALLY] ✓ Found Purchase Order #%s", purchase_order_number)
+        logger.info("[TALLY] Purchase Order vouchers searched: %s", searched)
         
         if not vouchers:
-            print(f"[ERROR] Purchase Order '{purchase_order_number}' not found!")
-            print(f"[INFO] Total {len(all_vouchers)} purchase orders were searched.")
-            print(f"[HINT] Please check the exact voucher number format in Tally.")
-            print(f"[HINT] Example voucher numbers from search:")
-            for i, v in enumerate(all_vouchers[:5]):
-                v_no = v.find('VOUCHERNUMBER')
-                if v_no:
-                    print(f"  - {v_no.text.strip()}")
+            logger.error("[ERROR] Purchase Order '%s' not found!", purchase_order_number)
+            logger.info("[INFO] Total %s purchase orders were searched.", searched)
+            logger.info("[HINT] Please check the exact voucher number format in Tally.")
+            logger.info("[HINT] Example voucher numbers from search:")
+            for v_no in sample_numbers:
+                logger.info("  - %s", v_no)
             return []
 
         purchase_order_data = []
         for idx, v in enumerate(vouchers, 1):
-            v_date = v.find('DATE').text if v.find('DATE') else ""
-            v_no = v.find('VOUCHERNUMBER').text if v.find('VOUCHERNUMBER') else ""
-            narration = v.find('NARRATION').text if v.find('NARRATION') else ""
-            
-            # Get vendor from PARTYNAME field
-            vendor_name = v.find('PARTYNAME').text if v.find('PARTYNAME') else ""
-            
-            # Get Reference Number (vendor PO Number)
-            reference_number = v.find('REFERENCE').text if v.find('REFERENCE') else ""
+            # DATE, VOUCHERNUMBER, PARTYNAME (vendor), NARRATION, REFERENCE (vendor PO number), ORDERSTATUS
+            fields = {t: xp(v) for t, xp in _XP_SCALARS.items()}
+            vendor_name = fields['PARTYNAME']
             
             # Get vendor Address
-            vendor_address = []
-            buyer_addr_list = v.find('BASICBUYERADDRESS.LIST')
-            if buyer_addr_list:
-                for addr in buyer_addr_list.find_all('BASICBUYERADDRESS'):
-                    if addr.text:
-                        vendor_address.append(addr.text.strip())
+            vendor_address = [t.strip() for t in _XP_VOUCHER_ADDR(v) if t.strip()]
             
             # Get Payment Terms using hierarchical method
             payment_terms = get_payment_terms_hierarchical(v, vendor_name)
             
-            # Get Order Status
-            order_status = v.find('ORDERSTATUS').text if v.find('ORDERSTATUS') else "Pending"
-            
             # Get Purchase Ledger using HIERARCHY METHOD (same as tally_purchase_order.py)
             # Method 1: Try to get from stock item's ledger account
             purchase_ledger = ""
             purchase_ledger_from_item = ""
             
+            # Inventory entries are looked up once and reused for line items
+            inv_entries = _XP_INV(v) or _XP_ALLINV(v)
+            
             # First, try to get purchase ledger from inventory entries
-            for item in v.find_all('INVENTORYENTRIES.LIST') or v.find_all('ALLINVENTORYENTRIES.LIST'):
-                item_ledger = item.find('LEDGERNAME')
-                if item_ledger and item_ledger.text:
+            for item in inv_entries:
+                item_ledger = item.find('.//LEDGERNAME')
+                if item_ledger is not None and item_ledger.text:
                     purchase_ledger_from_item = item_ledger.text.strip()
                     break
             
-            # Method 2: If not found in items, find the ledger with LARGEST POSITIVE amount
-            # (excluding vendor, taxes, and rounding) - for purchases, the ledger has positive amount
-            if not purchase_ledger_from_item:
-                max_positive_amount = 0
-                for entry in v.find_all('LEDGERENTRIES.LIST') or v.find_all('ALLLEDGERENTRIES.LIST'):
-                    name = entry.find('LEDGERNAME').text.strip() if entry.find('LEDGERNAME') else ""
-                    amt_tag = entry.find('AMOUNT')
-                    if amt_tag and amt_tag.text:
-                        numbers = re.findall(r'[-\d.]+', amt_tag.text.strip())
-                        if numbers:
-                            amt = float(numbers[-1])
-                        else:
-                            amt = 0.0
-                    else:
-                        amt = 0.0
-                    
-                    name_lower = name.lower()
-                    if name == vendor_name:  # Skip vendor
-                        continue
-                    if 'cgst' in name_lower or 'sgst' in name_lower or 'igst' in name_lower:  # Skip taxes
-                        continue
-                    if 'rounding' in name_lower:  # Skip rounding
-                        continue
-                    
-                    # Find the ledger with largest positive amount (this is the purchase ledger)
-                    if amt > max_positive_amount:
-                        max_positive_amount = amt
-                        purchase_ledger = name
-            else:
+            # Single pass over ledger entries: taxes, rounding off, and Method 2 -
+            # the ledger with LARGEST POSITIVE amount (excluding vendor, taxes, and
+            # rounding), used when no item ledger was found
+            taxes = []
+            rounding_off = 0.0
+            rounding_found = False
+            max_positive_amount = 0
+            for entry in _XP_LED(v) or _XP_ALLLED(v):
+                name = (entry.findtext('.//LEDGERNAME') or "").strip()
+                amt = _parse_amt(entry.findtext('.//AMOUNT'))
+                
+                m = _LEDGER_KIND_RE.search(name)
+                kind = m.group(1).lower() if m else None
+                
+                if kind == 'rounding':
+                    # Only the first rounding entry counts
+                    if not rounding_found:
+                        rounding_off = amt
+                        rounding_found = True
+                    continue
+                
+                if kind:
+                    rate_match = _RATE_RE.search(name)
+                    taxes.append({
+                        "tax_type": kind.upper(),
+                        "tax_name": name,
+                        "tax_rate": rate_match.group(1) if rate_match else "",  # Changed from "rate"
+                        "tax_amount": abs(amt)  # Changed from "amount"
+                    })
+                    continue
+                
+                if name == vendor_name:
+                    continue
+                
+                # Find the ledger with largest positive amount (this is the purchase ledger)
+                if amt > max_positive_amount:
+                    max_positive_amount = amt
+                    purchase_ledger = name
+            
+            if purchase_ledger_from_item:
                 purchase_ledger = purchase_ledger_from_item
             
             # Get Line Items
             line_items = []
-            for item in v.find_all('INVENTORYENTRIES.LIST') or v.find_all('ALLINVENTORYENTRIES.LIST'):
-                item_name = item.find('STOCKITEMNAME').text.strip() if item.find('STOCKITEMNAME') else ""
+            for item in inv_entries:
+                item_name = (item.findtext('.//STOCKITEMNAME') or "").strip()
                 
-                qty_tag = item.find('ACTUALQTY') or item.find('BILLEDQTY')
-                quantity = qty_tag.text.strip() if qty_tag else "0"
+                qty_tag = item.find('.//ACTUALQTY')
+                if qty_tag is None:
+                    qty_tag = item.find('.//BILLEDQTY')
+                quantity = (qty_tag.text or "").strip() if qty_tag is not None else "0"
                 
-                rate_tag = item.find('RATE')
-                if rate_tag and rate_tag.text:
-                    rate_text = rate_tag.text.split('/')[0].strip()
-                    numbers = re.findall(r'[-\d.]+', rate_text)
-                    if numbers:
-                        rate = float(numbers[-1])
-                    else:
-                        rate = 0.0
-                else:
-                    rate = 0.0
+                # RATE looks like "100.00/Nos" — only the part before the unit
+                rate = _parse_amt((item.findtext('.//RATE') or "").split('/')[0])
                 
-                discount_tag = item.find('DISCOUNT')
-                discount = discount_tag.text.strip() if discount_tag else "0"
+                discount_tag = item.find('.//DISCOUNT')
+                discount = (discount_tag.text or "").strip() if discount_tag is not None else "0"
                 
-                amount_tag = item.find('AMOUNT')
-                if amount_tag and amount_tag.text:
-                    amount_text = amount_tag.text.strip()
-                    numbers = re.findall(r'[-\d.]+', amount_text)
-                    if numbers:
-                        amount = float(numbers[-1])
-                    else:
-                        amount = 0.0
-                else:
-                    amount = 0.0
+                amount = _parse_amt(item.findtext('.//AMOUNT'))
                 
                 # Get reporting tags (Category and Cost Centre) from Tally
-                category = ""
-                cost_centre = ""
-                cat_alloc = item.find('CATEGORYALLOCATIONS.LIST')
-                if cat_alloc:
-                    category_tag = cat_alloc.find('CATEGORY')
-                    if category_tag:
-                        category = category_tag.text.strip()
-                    cc_list = cat_alloc.find('COSTCENTREALLOCATIONS.LIST')
-                    if cc_list:
-                        cc_name = cc_list.find('NAME')
-                        if cc_name:
-                            cost_centre = cc_name.text.strip()
+                category = _XP_ITEM_CATEGORY(item).strip()
+                cost_centre = _XP_ITEM_COST_CENTRE(item).strip()
                 
                 line_items.append({
                     "item_name": item_name,
@@ -317,77 +540,28 @@ def fetch_tally_purchase_orders(purchase_order_number="1"):
                     "cost_centre": cost_centre
                 })
             
-            # Get Tax Details
-            taxes = []
-            for entry in v.find_all('LEDGERENTRIES.LIST') or v.find_all('ALLLEDGERENTRIES.LIST'):
-                name = entry.find('LEDGERNAME').text.strip() if entry.find('LEDGERNAME') else ""
-                amount_tag = entry.find('AMOUNT')
-                if amount_tag and amount_tag.text:
-                    amount_text = amount_tag.text.strip()
-                    numbers = re.findall(r'[-\d.]+', amount_text)
-                    if numbers:
-                        amt = float(numbers[-1])
-                    else:
-                        amt = 0.0
-                else:
-                    amt = 0.0
-                
-                name_lower = name.lower()
-                if ('cgst' in name_lower or 'sgst' in name_lower or 'igst' in name_lower):
-                    tax_type = ""
-                    if 'cgst' in name_lower:
-                        tax_type = "CGST"
-                    elif 'sgst' in name_lower:
-                        tax_type = "SGST"
-                    elif 'igst' in name_lower:
-                        tax_type = "IGST"
-                    
-                    rate = ""
-                    if '%' in name:
-                        rate = name.split('%')[0].split()[-1]
-                    
-                    taxes.append({
-                        "tax_type": tax_type,
-                        "tax_name": name,
-                        "tax_rate": rate,  # Changed from "rate"
-                        "tax_amount": abs(amt)  # Changed from "amount"
-                    })
-            
-            # Get Rounding Off
-            rounding_off = 0.0
-            for entry in v.find_all('LEDGERENTRIES.LIST') or v.find_all('ALLLEDGERENTRIES.LIST'):
-                name = entry.find('LEDGERNAME').text.strip() if entry.find('LEDGERNAME') else ""
-                if 'rounding' in name.lower():
-                    amount_tag = entry.find('AMOUNT')
-                    if amount_tag and amount_tag.text:
-                        amount_text = amount_tag.text.strip()
-                        numbers = re.findall(r'[-\d.]+', amount_text)
-                        if numbers:
-                            rounding_off = float(numbers[-1])
-                    break
-            
             purchase_order_data.append({
-                "purchase_order_number": v_no,
-                "date": v_date,
+                "purchase_order_number": fields['VOUCHERNUMBER'],
+                "date": fields['DATE'],
                 "vendor_name": vendor_name,
-                "reference_number": reference_number,
+                "reference_number": fields['REFERENCE'],
                 "vendor_address": vendor_address,
                 "payment_terms": payment_terms,
-                "order_status": order_status,
+                "order_status": fields['ORDERSTATUS'],
                 "purchase_ledger": purchase_ledger,
                 "line_items": line_items,
                 "taxes": taxes,
                 "rounding_off": rounding_off,
-                "narration": narration
+                "narration": fields['NARRATION']
             })
         
         return purchase_order_data
     except Exception as e:
-        print(f"Error fetching Purchase Orders from Tally: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error fetching Purchase Orders from Tally: %s", e)
         return []
 
+# In memory only: the access token is a credential and is never written to disk
+@ttl_cache(ZOHO_TOKEN_TTL)
 def get_access_token():
     """Get Zoho OAuth access token"""
     url = "https://accounts.zoho.in/oauth/v2/token"
@@ -399,79 +573,130 @@ def get_access_token():
     }
     
     try:
-        response = requests.post(url, params=params)
+        response = _ZOHO_SESSION.post(url, params=params)
         if response.status_code == 200:
             return response.json().get("access_token")
     except Exception as e:
-        print(f"Error getting access token: {e}")
+        logger.error("Error getting access token: %s", e)
     return None
 
-def get_zoho_contacts(token):
-    """Fetch all vendor contacts from Zoho Books with pagination"""
+# Zoho error codes for an invalid / expired / unauthorised token
+_ZOHO_AUTH_ERROR_CODES = (14, 57)
+
+def check_zoho_auth(res):
+    """
+    Forget the cached access token when Zoho rejects it, so the next
+    get_access_token() call fetches a fresh one.
+    """
+    rejected = res.status_code == 401
+    if not rejected:
+        try:
+            rejected = res.json().get("code") in _ZOHO_AUTH_ERROR_CODES
+        except (ValueError, AttributeError):
+            return
+    if rejected:
+        logger.warning("🔄 Zoho rejected the access token - a new one will be fetched on the next call")
+        get_access_token.cache_clear()
+
+def zoho_lookup_get(url, headers, params):
+    """
+    GET a Zoho lookup endpoint within the shared concurrency limit, retrying
+    429 (rate limited) responses with backoff. The slot is released while
+    waiting so other lookups can use it.
+    """
+    for attempt in range(ZOHO_RATE_LIMIT_RETRIES + 1):
+        with _ZOHO_CALL_SLOTS:
+            res = _ZOHO_SESSION.get(url, headers=headers, params=params)
+        if res.status_code != 429 or attempt == ZOHO_RATE_LIMIT_RETRIES:
+            break
+        try:
+            delay = float(res.headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            delay = 2 ** attempt
+        logger.warning("⏳ Zoho rate limit hit, retrying in %gs...", delay)
+        time.sleep(delay)
+    check_zoho_auth(res)
+    return res
+
+def iter_zoho_pages(token, path, key, label):
+    """
+    Yield the `key` records of each page of a paginated Zoho list endpoint, in
+    page order. After page 1, pages are requested ZOHO_LOOKUP_WORKERS at a time
+    and consumed in order until Zoho reports has_more_page=False.
+    
+    Raises RuntimeError if any page fails, so callers never build (and cache)
+    a map from only the pages before it.
+    """
     headers = {"Authorization": f"Zoho-oauthtoken {token}"}
     
-    all_vendors = {}
-    page = 1
-    per_page = 200
+    def fetch_page(page):
+        params = {
+            "organization_id": ORGANIZATION_ID,
+            "page": page,
+            "per_page": 200
+        }
+        return zoho_lookup_get(f"{BASE_URL}{path}", headers, params)
     
-    try:
+    with ThreadPoolExecutor(max_workers=ZOHO_LOOKUP_WORKERS) as pool:
+        next_page, window = 1, 1
         while True:
-            params = {
-                "organization_id": ORGANIZATION_ID,
-                "page": page,
-                "per_page": per_page
-            }
-            
-            res = requests.get(f"{BASE_URL}/contacts", headers=headers, params=params)
-            if res.status_code == 200 and res.json().get("code") == 0:
-                contacts = res.json().get("contacts", [])
-                
-                if not contacts:
-                    break
+            pages = range(next_page, next_page + window)
+            for page, res in zip(pages, pool.map(fetch_page, pages)):
+                data = res.json() if res.status_code == 200 else {}
+                if data.get("code") != 0:
+                    raise RuntimeError(f"{label} page {page} failed: HTTP {res.status_code}")
                 
-                # Filter to only vendors
-                for c in contacts:
-                    if c.get("contact_type") == "vendor":
-                        all_vendors[c["contact_name"].lower()] = c
+                records = data.get(key, [])
+                if not records:
+                    return
+                yield records
                 
-                page_context = res.json().get("page_context", {})
-                has_more_page = page_context.get("has_more_page", False)
-                
-                if not has_more_page:
-                    break
-                
-                page += 1
-            else:
-                print(f"Error fetching contacts on page {page}: {res.status_code}")
-                break
+                if not data.get("page_context", {}).get("has_more_page", False):
+                    return
+            next_page += window
+            window = ZOHO_LOOKUP_WORKERS
+
+@ttl_cache(ZOHO_LOOKUP_TTL, persist="contacts")
+def get_zoho_contacts(token):
+    """Fetch all vendor contacts from Zoho Books with pagination"""
+    all_vendors = {}
+    
+    try:
+        for contacts in iter_zoho_pages(token, "/contacts", "contacts", "contacts"):
+            # Filter to only vendors
+            for c in contacts:
+                if c.get("contact_type") == "vendor":
+                    all_vendors[c["contact_name"].lower()] = c
         
         return all_vendors
     except Exception as e:
-        print(f"Error fetching contacts: {e}")
+        logger.warning("Error fetching contacts: %s", e)
     return {}
 
+@ttl_cache(ZOHO_LOOKUP_TTL, persist="accounts")
 def get_zoho_accounts(token):
     """Fetch all accounts (chart of accounts) from Zoho Books"""
     headers = {"Authorization": f"Zoho-oauthtoken {token}"}
     params = {"organization_id": ORGANIZATION_ID}
     
     try:
-        res = requests.get(f"{BASE_URL}/chartofaccounts", headers=headers, params=params)
+        res = zoho_lookup_get(f"{BASE_URL}/chartofaccounts", headers, params)
         if res.status_code == 200 and res.json().get("code") == 0:
             all_accounts = res.json().get("chartofaccounts", [])
             account_map = {acc["account_name"].lower(): acc for acc in all_accounts}
             return account_map
     except Exception as e:
-        print(f"Error fetching accounts: {e}")
+        logger.warning("Error fetching accounts: %s", e)
     return {}
 
+@ttl_cache(ZOHO_LOOKUP_TTL, persist="payment_terms")
 def get_zoho_payment_terms_list(token):
     """Fetch all payment terms from Zoho Books"""
     headers = {"Authorization": f"Zoho-oauthtoken {token}"}
     params = {"organization_id": ORGANIZATION_ID}
     
     try:
-        res = requests.get(f"{BASE_URL}/settings/paymentterms", headers=headers, params=params)
+        res = zoho_lookup_get(f"{BASE_URL}/settings/paymentterms", headers, params)
         if res.status_code == 200 and res.json().get("code") == 0:
             terms_data = res.json().get("data", {})
             terms_list = terms_data.get("payment_terms", [])
@@ -483,45 +708,70 @@ def get_zoho_payment_terms_list(token):
                 if term_label and term_id:
                     # Map by label (e.g., "Net 30")
                     terms_map[term_label.lower()] = term_id
+            
+            # "Net 30" / "30 Days" / "Net30" labels indexed by their day count,
+            # so a Tally "30 Days Credit" finds its term in one lookup. Ranks
+            # keep the old preference: "net N", then "N days", then "netN".
+            by_days = {}
+            ranks = {}
+            for label, term_id in terms_map.items():
+                m = _TERM_DAYS_RE.match(label)
+                if not m:
+                    continue
+                days = int(m.group(1) or m.group(2) or m.group(3))
+                rank = 0 if m.group(1) else 1 if m.group(2) else 2
+                if rank < ranks.get(days, 3):
+                    by_days[days] = term_id
+                    ranks[days] = rank
+            terms_map["_by_days"] = by_days
             return terms_map
     except Exception as e:
-        print(f"  [WARNING] Error fetching payment terms: {e}")
+        logger.warning("  [WARNING] Error fetching payment terms: %s", e)
     return {}
 
-def get_zoho_taxes(token):
-    """Fetch tax rates from Zoho Books"""
+@ttl_cache(ZOHO_LOOKUP_TTL, persist="tax_index")
+def get_zoho_tax_index(token):
+    """
+    Fetch tax rates from Zoho Books, indexed for PO tax lookups:
+    {"intra_by_rate", "inter_by_rate", "by_name", "default_gst18"}. Not the
+    {rate/name: tax} map the invoice and bills get_zoho_taxes return.
+    """
     headers = {"Authorization": f"Zoho-oauthtoken {token}"}
     params = {"organization_id": ORGANIZATION_ID}
     
     try:
-        res = requests.get(f"{BASE_URL}/settings/taxes", headers=headers, params=params)
+        res = zoho_lookup_get(f"{BASE_URL}/settings/taxes", headers, params)
         if res.status_code == 200 and res.json().get("code") == 0:
             all_taxes = res.json().get("taxes", [])
             
-            tax_map = {}
+            # One tax per rate for intrastate (non-IGST) and interstate (IGST)
+            # POs, first one listed by Zoho wins; rates are rounded so lookups
+            # tolerate float noise from parsed amounts
+            tax_map = {"intra_by_rate": {}, "inter_by_rate": {}, "by_name": {}}
             for tax in all_taxes:
                 tax_name = tax.get("tax_name", "").lower()
                 tax_rate = float(tax.get("tax_percentage", 0))
-                
-                # Store by rate
-                tax_map[tax_rate] = {
-                    "tax_id": tax["tax_id"],
-                    "tax_name": tax["tax_name"],
-                    "tax_percentage": tax_rate
-                }
-                
-                # Also store by name for lookup
-                tax_map[tax_name] = {
+                info = {
                     "tax_id": tax["tax_id"],
                     "tax_name": tax["tax_name"],
                     "tax_percentage": tax_rate
                 }
+                kind = "inter_by_rate" if "igst" in tax_name else "intra_by_rate"
+                tax_map[kind].setdefault(round(tax_rate, 4), info)
+                tax_map["by_name"][tax_name] = info
+            
+            # Default for POs whose rate has no match: GST18 (not IGST18), else
+            # any other non-IGST tax with 18 in its name
+            tax_map["default_gst18"] = tax_map["by_name"].get("gst18") or next(
+                (val for key, val in tax_map["by_name"].items()
+                 if "18" in key and "igst" not in key), None)
             
             return tax_map
     except Exception as e:
-        print(f"Error fetching taxes: {e}")
+        logger.warning("Error fetching taxes: %s", e)
     return {}
 
+@ttl_cache(ZOHO_LOOKUP_TTL, persist="tags")
 def get_zoho_tags(token):
     """Fetch all tags from Zoho Books using reporting_tags API"""
     headers = {"Authorization": f"Zoho-oauthtoken {token}"}
@@ -530,87 +780,81 @@ def get_zoho_tags(token):
     tag_map = {}
     try:
         # Get list of all tag categories
-        res = requests.get(f"{BASE_URL}/settings/tags", headers=headers, params=params)
+        res = zoho_lookup_get(f"{BASE_URL}/settings/tags", headers, params)
         if res.status_code == 200 and res.json().get("code") == 0:
             # Use 'reporting_tags' key instead of 'tags'
             categories = res.json().get("reporting_tags", [])
             
-            # Loop through each category to get detailed options
-            for category in categories:
+            # Get detailed options for each category; the detail GETs are
+            # independent, so run them concurrently and merge in category order
+            def fetch_tag_detail(category):
+                return zoho_lookup_get(f"{BASE_URL}/settings/tags/{category.get('tag_id')}",
+                                       headers, params)
+            
+            with ThreadPoolExecutor(max_workers=ZOHO_LOOKUP_WORKERS) as pool:
+                detail_responses = list(pool.map(fetch_tag_detail, categories))
+            
+            for category, detail_res in zip(categories, detail_responses):
                 tag_id = category.get("tag_id")
                 tag_name = category.get("tag_name")
                 
-                # Get detailed options for this tag
-                detail_res = requests.get(f"{BASE_URL}/settings/tags/{tag_id}", headers=headers, params=params)
-                if detail_res.status_code == 200:
-                    detail_data = detail_res.json()
-                    tag_obj = detail_data.get("tag", detail_data.get("reporting_tag", {}))
-                    # Use 'tag_options' instead of 'tag_option'
-                    options = tag_obj.get("tag_options", [])
-                    
-                    for option in options:
-                        option_name = option.get("tag_option_name", "")
-                        option_id = option.get("tag_option_id")
-                        if option_name and option_id:
-                            # Map by option name for easier lookup
-                            tag_map[option_name.lower()] = {
-                                "tag_id": tag_id,
-                                "tag_option_id": option_id,
-                                "tag_name": tag_name,
-                                "tag_option_name": option_name
-                            }
+                # A missing category would leave its options unmapped for the
+                # whole cache TTL, so fail the lookup instead
+                if detail_res.status_code != 200:
+                    raise RuntimeError(f"tag {tag_name} failed: HTTP {detail_res.status_code}")
+                detail_data = detail_res.json()
+                tag_obj = detail_data.get("tag", detail_data.get("reporting_tag", {}))
+                # Use 'tag_options' instead of 'tag_option'
+                options = tag_obj.get("tag_options", [])
+                
+                for option in options:
+                    option_name = option.get("tag_option_name", "")
+                    option_id = option.get("tag_option_id")
+                    if option_name and option_id:
+                        # Map by option name for easier lookup
+                        tag_map[option_name.lower()] = {
+                            "tag_id": tag_id,
+                            "tag_option_id": option_id,
+                            "tag_name": tag_name,
+                            "tag_option_name": option_name
+                        }
+        return tag_map
     except Exception as e:
-        print(f"  [WARNING] Error fetching tags: {e}")
-    return tag_map
+        logger.warning("  [WARNING] Error fetching tags: %s", e)
+    return {}
 
+@ttl_cache(ZOHO_LOOKUP_TTL, persist="items")
 def get_zoho_items(token):
     """Fetch all items from Zoho Books with their reporting tags"""
-    headers = {"Authorization": f"Zoho-oauthtoken {token}"}
-    
     all_items = {}
-    page = 1
-    per_page = 200
     
     try:
-        while True:
-            params = {
-                "organization_id": ORGANIZATION_ID,
-                "page": page,
-                "per_page": per_page
-            }
-            
-            res = requests.get(f"{BASE_URL}/items", headers=headers, params=params)
-            if res.status_code == 200 and res.json().get("code") == 0:
-                items = res.json().get("items", [])
-                
-                if not items:
-                    break
-                
-                # Store items with their tags
-                for item in items:
-                    item_name = item.get("name", "").lower()
-                    all_items[item_name] = {
-                        "item_id": item.get("item_id"),
-                        "name": item.get("name"),
-                        "tags": item.get("tags", [])  # This contains the reporting tags
-                    }
-                
-                page_context = res.json().get("page_context", {})
-                has_more_page = page_context.get("has_more_page", False)
-                
-                if not has_more_page:
-                    break
-                
-                page += 1
-            else:
-                print(f"Error fetching items on page {page}: {res.status_code}")
-                break
+        for items in iter_zoho_pages(token, "/items", "items", "items"):
+            # Store items with their tags
+            for item in items:
+                item_name = item.get("name", "").lower()
+                all_items[item_name] = {
+                    "item_id": item.get("item_id"),
+                    "name": item.get("name"),
+                    "tags": item.get("tags", [])  # This contains the reporting tags
+                }
         
         return all_items
     except Exception as e:
-        print(f"Error fetching items: {e}")
+        logger.warning("Error fetching items: %s", e)
     return {}
 
+def fetch_zoho_lookups(token):
+    """
+    Fetch the Zoho lookup maps a PO sync needs, concurrently.
+    Returns (contact_map, account_map, payment_terms_map, tax_map, tag_map, item_map)
+    """
+    lookups = (get_zoho_contacts, get_zoho_accounts, get_zoho_payment_terms_list,
+               get_zoho_tax_index, get_zoho_tags, get_zoho_items)
+    with ThreadPoolExecutor(max_workers=len(lookups)) as pool:
+        futures = [pool.submit(fn, token) for fn in lookups]
+        return tuple(f.result() for f in futures)
+
 
 def calculate_total_tax_rate(taxes):
     """Calculate total tax rate from CGST + SGST or IGST"""
@@ -632,16 +876,10 @@ def find_vendor_in_zoho(vendor_name, contact_map):
         return contact_map[vendor_lower], 100
     
     # Try fuzzy matching
-    best_match = None
-    best_score = 0
-    
-    for zoho_name, contact in contact_map.items():
-        score = fuzz.ratio(vendor_lower, zoho_name)
-        if score > best_score:
-            best_score = score
-            best_match = contact
-    
-    return best_match, best_score
+    result = process.extractOne(vendor_lower, contact_map.keys(), scorer=fuzz.ratio)
+    if not result or not result[1]:
+        return None, 0
+    return contact_map[result[0]], int(round(result[1]))
 
 def create_zoho_purchase_order(token, so_data, contact_map, account_map, payment_terms_map, tax_map, tag_map, item_map):
     """Create a Purchase Order in Zoho Books"""
@@ -655,41 +893,41 @@ def create_zoho_purchase_order(token, so_data, contact_map, account_map, payment
     else:
         zoho_date = tally_date
     
-    print(f"\n{'='*100}")
-    print(f"[Purchase Order] Processing Purchase Order #{so_data['purchase_order_number']} - Date: {tally_date}")
-    print(f"{'='*100}")
+    logger.info("\n%s", '=' * 100)
+    logger.info("[Purchase Order] Processing Purchase Order #%s - Date: %s", so_data['purchase_order_number'], tally_date)
+    logger.info("%s", '=' * 100)
     
     # Find vendor in Zoho Books
     vendor_info, match_score = find_vendor_in_zoho(so_data["vendor_name"], contact_map)
     
     if not vendor_info:
         error_msg = f"Vendor '{so_data['vendor_name']}' not found in Zoho Books"
-        print(f"  [ERROR] {error_msg}")
-        print(f"  [ACTION REQUIRED] Please create this vendor in Zoho Books manually and run again.")
-        print(f"  [SKIPPING] Skipping this Purchase Order...")
+        logger.error("  [ERROR] %s", error_msg)
+        logger.info("  [ACTION REQUIRED] Please create this vendor in Zoho Books manually and run again.")
+        logger.info("  [SKIPPING] Skipping this Purchase Order...")
         return {"success": False, "error": error_msg}
     
     if match_score == 100:
-        print(f"  [EXACT MATCH] Found vendor: {vendor_info['contact_name']}")
+        logger.info("  [EXACT MATCH] Found vendor: %s", vendor_info['contact_name'])
     else:
         if match_score < 80:
             error_msg = f"Low confidence match for vendor '{so_data['vendor_name']}' (Score: {match_score}%)"
-            print(f"  [WARNING] {error_msg}")
-            print(f"  [MATCH] Best match: '{vendor_info['contact_name']}' (Score: {match_score}%)")
-            print(f"  [ACTION] Please verify this is correct before proceeding")
+            logger.warning("  [WARNING] %s", error_msg)
+            logger.info("  [MATCH] Best match: '%s' (Score: %s%%)", vendor_info['contact_name'], match_score)
+            logger.info("  [ACTION] Please verify this is correct before proceeding")
             return {"success": False, "error": error_msg}
         else:
-            print(f"  [FUZZY MATCH] Matched '{so_data['vendor_name']}' → '{vendor_info['contact_name']}' (Score: {match_score}%)")
+            logger.info("  [FUZZY MATCH] Matched '%s' → '%s' (Score: %s%%)", so_data['vendor_name'], vendor_info['contact_name'], match_score)
     
-    print(f"  [vendor] {vendor_info['contact_name']} (ID: {vendor_info['contact_id']})")
+    logger.info("  [vendor] %s (ID: %s)", vendor_info['contact_name'], vendor_info['contact_id'])
     
     # Display additional info
     if so_data.get('reference_number'):
-        print(f"  [REF] {so_data['reference_number']}")
+        logger.info("  [REF] %s", so_data['reference_number'])
     if so_data.get('payment_terms'):
-        print(f"  [TERMS] {so_data['payment_terms']}")
+        logger.info("  [TERMS] %s", so_data['payment_terms'])
     if so_data.get('order_status'):
-        print(f"  [STATUS] {so_data['order_status']}")
+        logger.info("  [STATUS] %s", so_data['order_status'])
     
     # Build line items
     zoho_line_items = []
@@ -710,55 +948,46 @@ def create_zoho_purchase_order(token, so_data, contact_map, account_map, payment
     
     # First, try to find exact match by rate
     if total_tax_rate > 0:
-        # Search for appropriate tax based on transaction type
-        for key, val in tax_map.items():
-            if isinstance(key, float) and key == total_tax_rate:
-                tax_name_lower = val.get('tax_name', '').lower()
-                
-                # For intrastate (CGST+SGST), avoid IGST
-                if is_intrastate and 'igst' not in tax_name_lower:
-                    tax_info = val
-                    print(f"  [TAX MATCH] Intrastate transaction - Using {val['tax_name']} ({total_tax_rate}%)")
-                    break
-                # For interstate (IGST), prefer IGST
-                elif is_interstate and 'igst' in tax_name_lower:
-                    tax_info = val
-                    print(f"  [TAX MATCH] Interstate transaction - Using {val['tax_name']} ({total_tax_rate}%)")
-                    break
+        rate_key = round(total_tax_rate, 4)
+        # For intrastate (CGST+SGST), avoid IGST
+        if is_intrastate:
+            tax_info = tax_map.get("intra_by_rate", {}).get(rate_key)
+            if tax_info:
+                logger.info("  [TAX MATCH] Intrastate transaction - Using %s (%s%%)", tax_info['tax_name'], total_tax_rate)
+        # For interstate (IGST), prefer IGST
+        if not tax_info and is_interstate:
+            tax_info = tax_map.get("inter_by_rate", {}).get(rate_key)
+            if tax_info:
+                logger.info("  [TAX MATCH] Interstate transaction - Using %s (%s%%)", tax_info['tax_name'], total_tax_rate)
     
     # If exact tax not found OR tax rate is 0%, use default 18% GST (not IGST - for intrastate)
     if not tax_info:
         if total_tax_rate > 0:
-            print(f"  [WARNING] No matching tax found for {total_tax_rate}% ({'Intrastate' if is_intrastate else 'Interstate'})")
-            print(f"  [WARNING] Available taxes: {', '.join([str(k) for k in tax_map.keys() if isinstance(k, float)])}")
+            logger.warning("  [WARNING] No matching tax found for %s%% (%s)", total_tax_rate, 'Intrastate' if is_intrastate else 'Interstate')
+            available_rates = sorted(set(tax_map.get("intra_by_rate", {})) | set(tax_map.get("inter_by_rate", {})))
+            logger.warning("  [WARNING] Available taxes: %s", ', '.join(str(k) for k in available_rates))
         else:
-            print(f"  [INFO] Tax rate is 0% - using default 18% GST")
+            logger.info("  [INFO] Tax rate is 0%% - using default 18%% GST")
         
-        # Try to use GST18 (not IGST18) as default for intrastate transactions
-        # First check the _gst_taxes map which contains only GST (CGST+SGST) taxes
-        default_tax = tax_map.get("_gst_taxes", {}).get(18.0) or tax_map.get("gst18")
-        if not default_tax:
-            # If GST18 not found, try to find any 18% tax that's not IGST
-            for key, val in tax_map.items():
-                if isinstance(key, str) and "18" in key and "igst" not in key.lower():
-                    default_tax = val
-                    break
+        # GST18 (not IGST18) for intrastate transactions, picked in get_zoho_tax_index
+        default_tax = tax_map.get("default_gst18")
         
         if default_tax:
-            print(f"  [DEFAULT] Using default tax: {default_tax['tax_name']} (18%) instead of {total_tax_rate}%")
+            logger.info("  [DEFAULT] Using default tax: %s (18%%) instead of %s%%", default_tax['tax_name'], total_tax_rate)
             tax_info = default_tax
         else:
-            print(f"  [ERROR] No default 18% GST tax found!")
+            logger.error("  [ERROR] No default 18%% GST tax found!")
     
+    # Find purchase account (same for every line of the PO)
+    purchase_account_id = None
+    if so_data.get('purchase_ledger'):
+        purchase_account = account_map.get(so_data['purchase_ledger'].lower())
+        if purchase_account:
+            purchase_account_id = purchase_account['account_id']
+    
+    item_log = []
     for item in so_data["line_items"]:
-        print(f"  [ITEM] {item['item_name']} - Qty: {item['quantity']} @ Rs.{item['rate']}")
-        
-        # Find purchase account
-        purchase_account_id = None
-        if so_data.get('purchase_ledger'):
-            purchase_account = account_map.get(so_data['purchase_ledger'].lower())
-            if purchase_account:
-                purchase_account_id = purchase_account['account_id']
+        item_log.append(f"  [ITEM] {item['item_name']} - Qty: {item['quantity']} @ Rs.{item['rate']}")
         
         # Parse quantity
         qty_str = item['quantity'].split()[0] if item['quantity'] else "1"
@@ -788,14 +1017,14 @@ def create_zoho_purchase_order(token, so_data, contact_map, account_map, payment
         # Add account if found
         if purchase_account_id:
             line_item["account_id"] = purchase_account_id
-            print(f"     [ACCOUNT] Using purchase account: {so_data['purchase_ledger']}")
+            item_log.append(f"     [ACCOUNT] Using purchase account: {so_data['purchase_ledger']}")
         
         # Add reporting tags - prioritize Tally data, then fall back to Zoho Books item master
         tags = []
         
         # First, try to use category/cost centre from Tally
         if item.get('category') or item.get('cost_centre'):
-            print(f"     [TAGS FROM TALLY] Category: {item.get('category', 'N/A')}, Cost Centre: {item.get('cost_centre', 'N/A')}")
+            item_log.append(f"     [TAGS FROM TALLY] Category: {item.get('category', 'N/A')}, Cost Centre: {item.get('cost_centre', 'N/A')}")
             
             # Map Tally category to Zoho Books tags (direct lookup by option name)
             if item.get('category'):
@@ -805,7 +1034,7 @@ def create_zoho_purchase_order(token, so_data, contact_map, account_map, payment
                         "tag_id": category_tag["tag_id"],
                         "tag_option_id": category_tag["tag_option_id"]
                     })
-                    print(f"       - Mapped Category: {item['category']}")
+                    item_log.append(f"       - Mapped Category: {item['category']}")
             
             # Map Tally cost centre to Zoho Books tags (direct lookup by option name)
             if item.get('cost_centre'):
@@ -815,7 +1044,7 @@ def create_zoho_purchase_order(token, so_data, contact_map, account_map, payment
                         "tag_id": cc_tag["tag_id"],
                         "tag_option_id": cc_tag["tag_option_id"]
                     })
-                    print(f"       - Mapped Cost Centre: {item['cost_centre']}")
+                    item_log.append(f"       - Mapped Cost Centre: {item['cost_centre']}")
         
         # If no tags from Tally, fall back to Zoho Books item master
         if not tags:
@@ -824,16 +1053,16 @@ def create_zoho_purchase_order(token, so_data, contact_map, account_map, payment
             zoho_item = item_map.get(item_key)
             
             if zoho_item and zoho_item.get('tags'):
-                print(f"     [TAGS FROM ZOHO] Found {len(zoho_item['tags'])} tag(s) for item '{item['item_name']}'")
+                item_log.append(f"     [TAGS FROM ZOHO] Found {len(zoho_item['tags'])} tag(s) for item '{item['item_name']}'")
                 tags = zoho_item['tags']
                 
                 # Display the tags
                 for tag in tags:
                     tag_name = tag.get('tag_name', 'N/A')
                     tag_option = tag.get('tag_option_name', 'N/A')
-                    print(f"       - {tag_name}: {tag_option}")
+                    item_log.append(f"       - {tag_name}: {tag_option}")
             else:
-                print(f"     [INFO] No reporting tags found in Zoho for item '{item['item_name']}'")
+                item_log.append(f"     [INFO] No reporting tags found in Zoho for item '{item['item_name']}'")
 
         
         if tags:
@@ -841,12 +1070,16 @@ def create_zoho_purchase_order(token, so_data, contact_map, account_map, payment
         
         zoho_line_items.append(line_item)
     
+    # One write per PO keeps line output together when sync workers run in parallel
+    if item_log:
+        logger.info("%s", '\n'.join(item_log))
+    
     # Display taxes
     if so_data["taxes"]:
-        print(f"\n  [TAX] Taxes:")
+        logger.info("\n  [TAX] Taxes:")
         for tax in so_data["taxes"]:
-            print(f"     {tax['tax_type']} {tax.get('tax_rate', 'N/A')}%: Rs.{tax.get('tax_amount', 0)}")
-        print(f"     Total Tax Rate: {total_tax_rate}%")
+            logger.info("     %s %s%%: Rs.%s", tax['tax_type'], tax.get('tax_rate', 'N/A'), tax.get('tax_amount', 0))
+        logger.info("     Total Tax Rate: %s%%", total_tax_rate)
     
     # Map payment terms
     payment_terms_id = None
@@ -859,31 +1092,23 @@ def create_zoho_purchase_order(token, so_data, contact_map, account_map, payment
             payment_terms_id = payment_terms_map[tally_terms]
         else:
             # Extract number from Tally terms (e.g., "30 Days" -> "30")
-            numbers = re.findall(r'\d+', so_data["payment_terms"])
-            if numbers:
-                days = numbers[0]
-                # Try variations
-                variations = [
-                    f"net {days}",      # "net 30"
-                    f"{days} days",     # "30 days"
-                    f"net{days}",       # "net30"
-                ]
-                
-                for variation in variations:
-                    if variation in payment_terms_map:
-                        payment_terms_id = payment_terms_map[variation]
-                        payment_terms_days = int(days)
-                        break
-    
-    print(f"\n  [DEBUG] Payment Terms Mapping:")
-    print(f"    Tally: '{so_data.get('payment_terms', '')}'")
-    print(f"    Mapped ID: {payment_terms_id}")
-    print(f"    Days: {payment_terms_days}")
-    print(f"    Available terms: {list(payment_terms_map.keys())}")
+            days_match = _DIGITS_RE.search(so_data["payment_terms"])
+            if days_match:
+                days = int(days_match.group())
+                payment_terms_id = payment_terms_map.get("_by_days", {}).get(days)
+                if payment_terms_id:
+                    payment_terms_days = days
+    
+    logger.debug("\n  [DEBUG] Payment Terms Mapping:")
+    logger.debug("    Tally: '%s'", so_data.get('payment_terms', ''))
+    logger.debug("    Mapped ID: %s", payment_terms_id)
+    logger.debug("    Days: %s", payment_terms_days)
+    if not payment_terms_id or logger.isEnabledFor(logging.DEBUG):
+        logger.info("    Available terms: %s", [k for k in payment_terms_map if k != '_by_days'])
     
     if not payment_terms_id:
         if so_data.get("payment_terms"):
-            print(f"  [WARNING] Payment term '{so_data.get('payment_terms')}' not found in Zoho Books")
+            logger.warning("  [WARNING] Payment term '%s' not found in Zoho Books", so_data.get('payment_terms'))
     
     # Build payload
     payload = {
@@ -898,69 +1123,74 @@ def create_zoho_purchase_order(token, so_data, contact_map, account_map, payment
     # Add payment terms if available
     if payment_terms_id and payment_terms_days:
         payload["payment_terms"] = payment_terms_days
-        print(f"  [PAYMENT TERMS APPLIED] {payment_terms_days} days (ID: {payment_terms_id})")
+        logger.info("  [PAYMENT TERMS APPLIED] %s days (ID: %s)", payment_terms_days, payment_terms_id)
     else:
-        print(f"  [WARNING] Payment terms not mapped - will use default")
+        logger.warning("  [WARNING] Payment terms not mapped - will use default")
     
     # Add adjustment for rounding off
     if so_data.get("rounding_off"):
         payload["adjustment"] = so_data["rounding_off"]
-        print(f"  [ROUNDING] Adjustment: Rs.{so_data['rounding_off']}")
+        logger.info("  [ROUNDING] Adjustment: Rs.%s", so_data['rounding_off'])
     
     # Debug: Confirm Purchase Order number is in payload
-    print(f"\n  [DEBUG] Purchase Order Number in Payload: '{payload.get('purchaseorder_number', 'NOT SET')}'")
-    print(f"  [DEBUG] Reference Number in Payload: '{payload.get('reference_number', 'NOT SET')}'")
+    logger.debug("\n  [DEBUG] Purchase Order Number in Payload: '%s'", payload.get('purchaseorder_number', 'NOT SET'))
+    logger.debug("  [DEBUG] Reference Number in Payload: '%s'", payload.get('reference_number', 'NOT SET'))
     
     # Create Purchase Order
-    print(f"\n  [CREATE] Creating Purchase Order in Zoho Books...")
-    print(f"  Payload: {json.dumps(payload, indent=2)}")
+    logger.info("\n  [CREATE] Creating Purchase Order in Zoho Books...")
+    if DEBUG_PAYLOAD:
+        logger.info("  Payload: %s", json.dumps(payload, indent=2))
     
     try:
-        res = requests.post(f"{BASE_URL}/purchaseorders", headers=headers, params=params, json=payload)
+        res = _ZOHO_SESSION.post(f"{BASE_URL}/purchaseorders", headers=headers, params=params, json=payload)
+        check_zoho_auth(res)
+        result = res.json()
         
         # Log response
-        with open("purchaseorder_response.log", "w") as f:
+        with _RESPONSE_LOG_LOCK, open("purchaseorder_response.log", "w") as f:
             f.write(f"Status Code: {res.status_code}\n")
-            f.write(f"Response: {json.dumps(res.json(), indent=2)}\n")
+            f.write("Response: ")
+            json.dump(result, f)
+            f.write("\n")
         
-        if res.status_code == 201 and res.json().get("code") == 0:
-            so_id = res.json()["purchaseorder"]["purchaseorder_id"]
-            print(f"  [SUCCESS] Purchase Order created successfully!")
-            print(f"  [ID] Zoho Purchase Order ID: {so_id}")
+        if res.status_code == 201 and result.get("code") == 0:
+            so_id = result["purchaseorder"]["purchaseorder_id"]
+            logger.info("  [SUCCESS] Purchase Order created successfully!")
+            logger.info("  [ID] Zoho Purchase Order ID: %s", so_id)
             
             # Update status if needed (Zoho creates POs as "draft" by default)
             # If Tally status is "Open" or anything other than "Pending"/"Draft", mark as open
             tally_status = so_data.get("order_status", "Pending").lower()
             if tally_status not in ["pending", "draft", ""]:
-                print(f"  [STATUS] Tally status is '{so_data.get('order_status')}' - marking PO as open in Zoho...")
+                logger.info("  [STATUS] Tally status is '%s' - marking PO as open in Zoho...", so_data.get('order_status'))
                 try:
                     # Mark PO as open (issued) in Zoho Books
-                    status_res = requests.post(
+                    status_res = _ZOHO_SESSION.post(
                         f"{BASE_URL}/purchaseorders/{so_id}/status/open",
                         headers=headers,
                         params=params
                     )
+                    check_zoho_auth(status_res)
                     if status_res.status_code == 200 and status_res.json().get("code") == 0:
-                        print(f"  [SUCCESS] Purchase Order marked as 'open' in Zoho Books")
+                        logger.info("  [SUCCESS] Purchase Order marked as 'open' in Zoho Books")
                     else:
-                        print(f"  [WARNING] Could not update status: {status_res.json().get('message', 'Unknown error')}")
+                        logger.warning("  [WARNING] Could not update status: %s", status_res.json().get('message', 'Unknown error'))
                 except Exception as e:
-                    print(f"  [WARNING] Could not update PO status: {e}")
+                    logger.warning("  [WARNING] Could not update PO status: %s", e)
             else:
-                print(f"  [INFO] Purchase Order created as 'draft' (Tally status: {so_data.get('order_status', 'Pending')})")
+                logger.info("  [INFO] Purchase Order created as 'draft' (Tally status: %s)", so_data.get('order_status', 'Pending'))
             
             return {"success": True, "purchaseorder_id": so_id}
         else:
-            print(f"  [FAILED] Status: {res.status_code}")
-            error_data = res.json()
+            logger.error("  [FAILED] Status: %s", res.status_code)
+            error_data = result
             error_msg = error_data.get("message", "Unknown error")
-            print(f"  Response: {json.dumps(error_data, indent=2)}")
-            print(f"  [INFO] Full response saved to purchaseorder_response.log")
+            logger.error("  [ERROR] %s", error_msg)
+            logger.debug("Zoho purchase order error response: %s", error_data)
+            logger.info("  [INFO] Full response saved to purchaseorder_response.log")
             return {"success": False, "error": f"{error_msg} (Code: {error_data.get('code', 'N/A')})"}
     except Exception as e:
-        print(f"  [ERROR] Failed to create Purchase Order: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("  [ERROR] Failed to create Purchase Order: %s", e)
         return {"success": False, "error": str(e)}
 
 # ----------------------------------------------------------
@@ -980,7 +1210,7 @@ def get_all_purchase_orders_data(from_date="20250401", to_date="20250430", limit
         
         # Calculate stats
         total_orders = len(purchase_orders)
-        total_amount = sum(po.get("total_amount", 0) for po in purchase_orders)
+        total_amount = fsum(map(itemgetter("total_amount"), purchase_orders))
         
         return {
             "purchase_orders": purchase_orders,
@@ -992,9 +1222,7 @@ def get_all_purchase_orders_data(from_date="20250401", to_date="20250430", limit
             }
         }
     except Exception as e:
-        print(f"❌ Error in get_all_purchase_orders_data: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error in get_all_purchase_orders_data: %s", e)
         return None
 
 def fetch_tally_purchase_orders_range(from_date="20250401", to_date="20250430", limit=None):
@@ -1006,8 +1234,21 @@ def fetch_tally_purchase_orders_range(from_date="20250401", to_date="20250430",
         to_date: End date in YYYYMMDD format
         limit: Maximum number of purchase orders to fetch
     """
-    ledger_map = get_ledger_map_from_tally()
+    try:
+        purchase_order_data = list(iter_tally_purchase_orders_range(from_date, to_date, limit))
+    except Exception as e:
+        logger.exception("❌ Error fetching Tally purchase orders: %s", e)
+        return []
     
+    logger.info("✅ Fetched %s purchase order(s)", len(purchase_order_data))
+    return purchase_order_data
+
+def iter_tally_purchase_orders_range(from_date="20250401", to_date="20250430", limit=None):
+    """
+    Yield Purchase Orders from Tally one at a time as the export is parsed.
+    Same fields and arguments as fetch_tally_purchase_orders_range; errors
+    are raised to the caller.
+    """
     xml_request = f"""<ENVELOPE><HEADER><TALLYREQUEST>Export Data</TALLYREQUEST></HEADER>
     <BODY><EXPORTDATA><REQUESTDESC><REPORTNAME>Voucher Register</REPORTNAME>
     <STATICVARIABLES><SVEXPORTFORMAT>$$SysName:XML</SVEXPORTFORMAT>
@@ -1015,193 +1256,174 @@ def fetch_tally_purchase_orders_range(from_date="20250401", to_date="20250430",
     <SVFROMDATE>{from_date}</SVFROMDATE><SVTODATE>{to_date}</SVTODATE>
     </STATICVARIABLES></REQUESTDESC></EXPORTDATA></BODY></ENVELOPE>"""
 
-    try:
-        print(f"📥 Fetching purchase orders from Tally ({from_date} to {to_date})...")
-        response = requests.post(TALLY_URL, data=xml_request, timeout=90)
-        soup = BeautifulSoup(response.content, 'lxml-xml')
+    logger.info("📥 Fetching purchase orders from Tally (%s to %s)...", from_date, to_date)
+    response = _TALLY_SESSION.post(TALLY_URL, data=xml_request, timeout=90, stream=True)
+    
+    count = 0
+    
+    for v in iter_tally_vouchers(response):
+        # One pass over the voucher's direct children picks up the scalar
+        # fields and the entry lists; nested layouts fall back to XPath below.
+        fields = {}
+        inv_entries = []
+        all_inv_entries = []
+        led_entries = []
+        all_led_entries = []
+        buyer_addr_list = None
+        for c in v.iterchildren(tag=etree.Element):
+            t = c.tag
+            if t in _SCALAR_TAGS:
+                fields.setdefault(t, c.text or "")
+            elif t == 'INVENTORYENTRIES.LIST':
+                inv_entries.append(c)
+            elif t == 'ALLINVENTORYENTRIES.LIST':
+                all_inv_entries.append(c)
+            elif t == 'LEDGERENTRIES.LIST':
+                led_entries.append(c)
+            elif t == 'ALLLEDGERENTRIES.LIST':
+                all_led_entries.append(c)
+            elif t == 'BASICBUYERADDRESS.LIST' and buyer_addr_list is None:
+                buyer_addr_list = c
         
-        vouchers = soup.find_all('VOUCHER')
-        if limit:
-            vouchers = vouchers[:limit]
+        # Scalars nested deeper (e.g. REFERENCE under INVOICEORDERLIST.LIST)
+        for t in _SCALAR_TAGS - fields.keys():
+            fields[t] = _XP_SCALARS[t](v)
+        inv_entries = inv_entries or all_inv_entries or _XP_INV(v) or _XP_ALLINV(v)
+        led_entries = led_entries or all_led_entries or _XP_LED(v) or _XP_ALLLED(v)
+        if buyer_addr_list is None:
+            buyer_addr_list = v.find('.//BASICBUYERADDRESS.LIST')
         
-        purchase_order_data = []
+        vendor_name = fields.get('PARTYNAME', "")
         
-        for v in vouchers:
-            v_date = v.find('DATE').text if v.find('DATE') else ""
-            v_no = v.find('VOUCHERNUMBER').text if v.find('VOUCHERNUMBER') else ""
-            vendor_name = v.find('PARTYNAME').text if v.find('PARTYNAME') else ""
-            narration = v.find('NARRATION').text if v.find('NARRATION') else ""
-            
-            # Get Reference Number
-            reference_number = v.find('REFERENCE').text if v.find('REFERENCE') else ""
+        # Get Vendor Address
+        vendor_address = []
+        if buyer_addr_list is not None:
+            vendor_address = [t.strip() for t in _XP_ADDR(buyer_addr_list) if t.strip()]
+        
+        # Get Payment Terms
+        payment_terms = get_payment_terms_hierarchical(v, vendor_name)
+        
+        # Get Purchase Ledger
+        purchase_ledger = ""
+        for item in inv_entries:
+            item_ledger = item.find('.//LEDGERNAME')
+            if item_ledger is not None and item_ledger.text:
+                purchase_ledger = item_ledger.text.strip()
+                break
+        
+        # Single pass over ledger entries: taxes, rounding off, and the
+        # fallback purchase ledger (largest positive non-vendor/tax/rounding amount)
+        taxes = []
+        rounding_off = 0.0
+        rounding_found = False
+        fallback_ledger = ""
+        max_positive_amount = 0
+        for entry in led_entries:
+            name = (entry.findtext('.//LEDGERNAME') or "").strip()
+            amt = _parse_amt(entry.findtext('.//AMOUNT'))
             
-            # Get Vendor Address
-            vendor_address = []
-            buyer_addr_list = v.find('BASICBUYERADDRESS.LIST')
-            if buyer_addr_list:
-                for addr in buyer_addr_list.find_all('BASICBUYERADDRESS'):
-                    if addr.text:
-                        vendor_address.append(addr.text.strip())
+            # For purchase orders, check for tax ledgers (CGST/SGST/IGST) - no need to filter for "output"
+            m = _LEDGER_KIND_RE.search(name)
+            kind = m.group(1).lower() if m else None
             
-            # Get Payment Terms
-            payment_terms = get_payment_terms_hierarchical(v, vendor_name)
+            if kind == 'rounding':
+                # Only the first rounding entry counts
+                if not rounding_found:
+                    rounding_off = amt
+                    rounding_found = True
+                continue
             
-            # Get Order Status
-            order_status = v.find('ORDERSTATUS').text if v.find('ORDERSTATUS') else "Pending"
+            if kind:
+                rate_match = _RATE_RE.search(name)
+                tax_rate = rate_match.group(1) if rate_match else ""
+                
+                taxes.append({
+                    "tax_name": name,
+                    "tax_type": kind.upper(),
+                    "tax_rate": tax_rate,
+                    "tax_amount": abs(amt)
+                })
+                continue
             
-            # Get Purchase Ledger
-            purchase_ledger = ""
-            for item in v.find_all('INVENTORYENTRIES.LIST') or v.find_all('ALLINVENTORYENTRIES.LIST'):
-                item_ledger = item.find('LEDGERNAME')
-                if item_ledger and item_ledger.text:
-                    purchase_ledger = item_ledger.text.strip()
-                    break
+            if name == vendor_name:
+                continue
             
-            if not purchase_ledger:
-                max_positive_amount = 0
-                for entry in v.find_all('LEDGERENTRIES.LIST') or v.find_all('ALLLEDGERENTRIES.LIST'):
-                    name = entry.find('LEDGERNAME').text.strip() if entry.find('LEDGERNAME') else ""
-                    amount_tag = entry.find('AMOUNT')
-                    if amount_tag and amount_tag.text:
-                        numbers = re.findall(r'[-\d.]+', amount_tag.text)
-                        amt = float(numbers[-1]) if numbers else 0.0
-                    else:
-                        amt = 0.0
-                    
-                    name_lower = name.lower()
-                    if name == vendor_name or 'cgst' in name_lower or 'sgst' in name_lower or 'igst' in name_lower or 'rounding' in name_lower:
-                        continue
-                    
-                    if amt > max_positive_amount:
-                        max_positive_amount = amt
-                        purchase_ledger = name
+            if amt > max_positive_amount:
+                max_positive_amount = amt
+                fallback_ledger = name
+        
+        if not purchase_ledger:
+            purchase_ledger = fallback_ledger
+        
+        # Get line items
+        line_items = []
+        
+        for item in inv_entries:
+            item_name = (item.findtext('.//STOCKITEMNAME') or "").strip()
             
-            # Get line items
-            line_items = []
-            subtotal = 0
+            qty_tag = item.find('.//ACTUALQTY')
+            if qty_tag is None:
+                qty_tag = item.find('.//BILLEDQTY')
+            quantity = (qty_tag.text or "").strip() if qty_tag is not None else "0"
             
-            for item in v.find_all('INVENTORYENTRIES.LIST') or v.find_all('ALLINVENTORYENTRIES.LIST'):
-                item_name = item.find('STOCKITEMNAME').text.strip() if item.find('STOCKITEMNAME') else ""
-                
-                qty_tag = item.find('ACTUALQTY') or item.find('BILLEDQTY')
-                quantity = qty_tag.text.strip() if qty_tag else "0"
-                
-                rate_tag = item.find('RATE')
-                if rate_tag and rate_tag.text:
-                    rate_text = rate_tag.text.split('/')[0].strip()
-                    numbers = re.findall(r'[-\d.]+', rate_text)
-                    rate = float(numbers[-1]) if numbers else 0.0
-                else:
-                    rate = 0.0
-                
-                discount_tag = item.find('DISCOUNT')
-                discount = discount_tag.text.strip() if discount_tag else "0"
-                
-                amount_tag = item.find('AMOUNT')
-                if amount_tag and amount_tag.text:
-                    amount_text = amount_tag.text.strip()
-                    numbers = re.findall(r'[-\d.]+', amount_text)
-                    amount = float(numbers[-1]) if numbers else 0.0
-                else:
-                    amount = 0.0
-                
-                # Get reporting tags
-                category = ""
-                cost_centre = ""
-                cat_alloc = item.find('CATEGORYALLOCATIONS.LIST')
-                if cat_alloc:
-                    category_tag = cat_alloc.find('CATEGORY')
-                    if category_tag:
-                        category = category_tag.text.strip()
-                    cc_list = cat_alloc.find('COSTCENTREALLOCATIONS.LIST')
-                    if cc_list:
-                        cc_name = cc_list.find('NAME')
-                        if cc_name:
-                            cost_centre = cc_name.text.strip()
-                
-                line_items.append({
-                    "item_name": item_name,
-                    "quantity": quantity,
-                    "rate": rate,
-                    "discount": discount,
-                    "amount": abs(amount),
-                    "category": category,
-                    "cost_centre": cost_centre
-                })
-                
-                subtotal += abs(amount)
+            # RATE looks like "100.00/Nos" — only the part before the unit
+            rate = _parse_amt((item.findtext('.//RATE') or "").split('/')[0])
             
-            # Get tax details - For PURCHASE orders, look for INPUT taxes (not output)
-            taxes = []
-            tax_total = 0
-            for entry in v.find_all('LEDGERENTRIES.LIST') or v.find_all('ALLLEDGERENTRIES.LIST'):
-                name = entry.find('LEDGERNAME').text.strip() if entry.find('LEDGERNAME') else ""
-                
-                amount_tag = entry.find('AMOUNT')
-                if amount_tag and amount_tag.text:
-                    amount_text = amount_tag.text.strip()
-                    numbers = re.findall(r'[-\d.]+', amount_text)
-                    amt = float(numbers[-1]) if numbers else 0.0
-                else:
-                    amt = 0.0
-                
-                name_lower = name.lower()
-                # For purchase orders, check for tax ledgers (CGST/SGST/IGST) - no need to filter for "output"
-                if ('cgst' in name_lower or 'sgst' in name_lower or 'igst' in name_lower):
-                    tax_rate = ""
-                    if '%' in name:
-                        tax_rate = name.split('%')[0].split()[-1]
-                    
-                    tax_type = "CGST" if 'cgst' in name_lower else ("SGST" if 'sgst' in name_lower else "IGST")
-                    taxes.append({
-                        "tax_name": name,
-                        "tax_type": tax_type,
-                        "tax_rate": tax_rate,
-                        "tax_amount": abs(amt)
-                    })
-                    tax_total += abs(amt)
+            discount_tag = item.find('.//DISCOUNT')
+            discount = (discount_tag.text or "").strip() if discount_tag is not None else "0"
             
-            # Get rounding off
-            rounding_off = 0.0
-            for entry in v.find_all('LEDGERENTRIES.LIST') or v.find_all('ALLLEDGERENTRIES.LIST'):
-                name = entry.find('LEDGERNAME').text.strip() if entry.find('LEDGERNAME') else ""
-                if 'rounding' in name.lower():
-                    amount_tag = entry.find('AMOUNT')
-                    if amount_tag and amount_tag.text:
-                        numbers = re.findall(r'[-\d.]+', amount_tag.text)
-                        rounding_off = float(numbers[-1]) if numbers else 0.0
-                    break
+            amount = _parse_amt(item.findtext('.//AMOUNT'))
             
-            total_amount = subtotal + tax_total + rounding_off
+            # Get reporting tags
+            category = _XP_ITEM_CATEGORY(item).strip()
+            cost_centre = _XP_ITEM_COST_CENTRE(item).strip()
             
-            purchase_order_data.append({
-                "purchase_order_number": v_no,
-                "date": v_date,
-                "vendor_name": vendor_name,
-                "reference_number": reference_number,
-                "vendor_address": vendor_address,
-                "payment_terms": payment_terms,
-                "order_status": order_status,
-                "purchase_ledger": purchase_ledger,
-                "narration": narration,
-                "line_items": line_items,
-                "taxes": taxes,
-                "rounding_off": rounding_off,
-                "subtotal": round(subtotal, 2),
-                "tax_total": round(tax_total, 2),
-                "total_amount": round(total_amount, 2)
+            line_items.append({
+                "item_name": item_name,
+                "quantity": quantity,
+                "rate": rate,
+                "discount": discount,
+                "amount": abs(amount),
+                "category": category,
+                "cost_centre": cost_centre
             })
         
-        print(f"✅ Fetched {len(purchase_order_data)} purchase order(s)")
-        return purchase_order_data
-    
-    except Exception as e:
-        print(f"❌ Error fetching Tally purchase orders: {e}")
-        import traceback
-        traceback.print_exc()
-        return []
+        # Line and tax amounts are stored as absolute values already
+        subtotal = fsum(map(itemgetter("amount"), line_items))
+        tax_total = fsum(map(itemgetter("tax_amount"), taxes))
+        total_amount = subtotal + tax_total + rounding_off
+        
+        count += 1
+        yield {
+            "purchase_order_number": fields.get('VOUCHERNUMBER', ""),
+            "date": fields.get('DATE', ""),
+            "vendor_name": vendor_name,
+            "reference_number": fields.get('REFERENCE', ""),
+            "vendor_address": vendor_address,
+            "payment_terms": payment_terms,
+            "order_status": fields.get('ORDERSTATUS', "Pending"),
+            "purchase_ledger": purchase_ledger,
+            "narration": fields.get('NARRATION', ""),
+            "line_items": line_items,
+            "taxes": taxes,
+            "rounding_off": rounding_off,
+            "subtotal": round(subtotal, 2),
+            "tax_total": round(tax_total, 2),
+            "total_amount": round(total_amount, 2)
+        }
+        
+        # Stop before parsing the next voucher once the limit is reached
+        if limit and count >= limit:
+            break
+
+def clear_lookup_caches():
+    """Drop the cached Zoho token and Zoho / Tally master lookups so the next sync refetches them"""
+    for fn in (get_access_token, get_zoho_contacts, get_zoho_accounts, get_zoho_payment_terms_list,
+               get_zoho_tax_index, get_zoho_tags, get_zoho_items, get_ledger_map_from_tally,
+               get_ledger_credit_periods):
+        fn.cache_clear()
 
-def sync_purchase_orders_to_zoho(selected_orders=None, from_date="20250401", to_date="20250430", limit=None):
+def sync_purchase_orders_to_zoho(selected_orders=None, from_date="20250401", to_date="20250430", limit=None, refresh=False):
     """
     Sync purchase orders to Zoho Books
     
@@ -1210,56 +1432,80 @@ def sync_purchase_orders_to_zoho(selected_orders=None, from_date="20250401", to_
         from_date: Start date in YYYYMMDD format
         to_date: End date in YYYYMMDD format
         limit: Maximum number of purchase orders to sync
+        refresh: Refetch Zoho contacts/accounts/taxes/etc. instead of using cached copies
     """
     try:
-        print("🚀 Starting Zoho Sync (Purchase Orders)...")
+        logger.info("🚀 Starting Zoho Sync (Purchase Orders)...")
+        
+        if refresh:
+            clear_lookup_caches()
         
         # Get access token
         token = get_access_token()
         if not token:
             return {"status": "error", "message": "Failed to get access token"}
         
-        # Get Zoho data
-        contact_map = get_zoho_contacts(token)
-        account_map = get_zoho_accounts(token)
-        payment_terms_map = get_zoho_payment_terms_list(token)
-        tax_map = get_zoho_taxes(token)
-        tag_map = get_zoho_tags(token)
-        item_map = get_zoho_items(token)
+        # Get Zoho data. The maps are cached between syncs and shared by all
+        # workers, so hand out read-only views.
+        (contact_map, account_map, payment_terms_map,
+         tax_map, tag_map, item_map) = map(MappingProxyType, fetch_zoho_lookups(token))
         
-        # Get purchase orders to sync
+        # Get purchase orders to sync. Orders fetched from Tally are streamed
+        # straight into the worker pool so POSTs start while Tally is parsed.
         if not selected_orders:
-            orders_to_sync = fetch_tally_purchase_orders_range(from_date, to_date, limit)
+            orders_to_sync = iter_tally_purchase_orders_range(from_date, to_date, limit)
         else:
             orders_to_sync = selected_orders
             if limit and len(orders_to_sync) > limit:
                 orders_to_sync = orders_to_sync[:limit]
         
-        if not orders_to_sync:
-            return {"status": "error", "message": "No purchase orders to sync"}
-        
-        print(f"📊 Syncing {len(orders_to_sync)} purchase order(s) to Zoho Books...")
-        
         stats = {"created": 0, "failed": 0, "errors": []}
+        fetch_error = None
         
-        for po in orders_to_sync:
-            result = create_zoho_purchase_order(token, po, contact_map, account_map, payment_terms_map, tax_map, tag_map, item_map)
-            if result.get("success"):
-                stats["created"] += 1
-                print(f"✅ Synced Purchase Order #{po['purchase_order_number']}")
-            else:
-                stats["failed"] += 1
-                stats["errors"].append({
-                    "purchase_order_number": po['purchase_order_number'],
-                    "vendor": po['vendor_name'],
-                    "error": result.get("error", "Unknown error")
-                })
-                print(f"❌ Failed Purchase Order #{po['purchase_order_number']}")
+        # POs are independent, so POST them concurrently; results are tallied
+        # here on the calling thread as each request finishes.
+        with ThreadPoolExecutor(max_workers=PO_SYNC_WORKERS) as pool:
+            futures = {}
+            try:
+                for po in orders_to_sync:
+                    futures[pool.submit(create_zoho_purchase_order, token, po, contact_map, account_map,
+                                        payment_terms_map, tax_map, tag_map, item_map)] = po
+            except Exception as e:
+                # Orders already queued are still synced, but the result is
+                # flagged as partial: the rest of the range was never read
+                logger.exception("❌ Error fetching Tally purchase orders: %s", e)
+                fetch_error = f"Tally fetch stopped after {len(futures)} purchase order(s): {e}"
+            
+            if not futures:
+                return {"status": "error", "message": fetch_error or "No purchase orders to sync"}
+            
+            logger.info("📊 Syncing %s purchase order(s) to Zoho Books...", len(futures))
+            
+            for future in as_completed(futures):
+                po = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"success": False, "error": str(e)}
+                
+                if result.get("success"):
+                    stats["created"] += 1
+                    logger.info("✅ Synced Purchase Order #%s", po['purchase_order_number'])
+                else:
+                    stats["failed"] += 1
+                    stats["errors"].append({
+                        "purchase_order_number": po['purchase_order_number'],
+                        "vendor": po['vendor_name'],
+                        "error": result.get("error", "Unknown error")
+                    })
+                    logger.warning("❌ Failed Purchase Order #%s", po['purchase_order_number'])
         
+        if fetch_error:
+            return {"status": "success", "partial": True, "fetch_error": fetch_error, "stats": stats}
         return {"status": "success", "stats": stats}
         
     except Exception as e:
-        print(f"❌ Error in sync_purchase_orders_to_zoho: {e}")
+        logger.exception("❌ Error in sync_purchase_orders_to_zoho: %s", e)
         return {"status": "error", "message": str(e)}
 
 def main():
@@ -1287,13 +1533,8 @@ def main():
     
     # Fetch contacts, accounts, payment terms, taxes, tags, and items
     print("\n[FETCH] Fetching Zoho Books data...")
-    contact_map = get_zoho_contacts(token)
-    account_map = get_zoho_accounts(token)
-    payment_terms_map = get_zoho_payment_terms_list(token)
-    tax_map = get_zoho_taxes(token)
-    tag_map = get_zoho_tags(token)
-    item_map = get_zoho_items(token)
-    print(f"[SUCCESS] Loaded {len(contact_map)} vendors, {len(account_map)} accounts, {len(payment_terms_map)} payment terms, {len([k for k in tax_map.keys() if isinstance(k, float)])} taxes, {len(tag_map)} tags, {len(item_map)} items")
+    contact_map, account_map, payment_terms_map, tax_map, tag_map, item_map = fetch_zoho_lookups(token)
+    print(f"[SUCCESS] Loaded {len(contact_map)} vendors, {len(account_map)} accounts, {len(payment_terms_map) - ('_by_days' in payment_terms_map)} payment terms, {len(tax_map.get('by_name', {}))} taxes, {len(tag_map)} tags, {len(item_map)} items")
     
     # Fetch Purchase Order from Tally
     print(f"\n[FETCH] Fetching Purchase Order '{purchase_order_number}' from Tally...")
@@ -1316,4 +1557,5 @@ def main():
     print(f"{'='*100}")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     main()
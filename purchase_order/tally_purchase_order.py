@@ -1,210 +1,203 @@
+import os
+import re
+import sys
 import requests
-from bs4 import BeautifulSoup
+
+# Project root on the path for the shared modules/ helpers
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.tally_xml import iter_tally_elements
 
 TALLY_URL = "http://localhost:9000"
 
-def fetch_all_purchase_orders(num_orders=5):
-    """Fetch Purchase Orders using XML approach similar to sales orders"""
+# Numeric token in Tally amount/rate text (e.g. "-1234.56", "100.00/Nos")
+_NUM_RE = re.compile(r'[-\d.]+')
+
+def _parse_amount(text):
+    """Last number in a Tally amount/rate string, 0.0 if there is none"""
+    if not text:
+        return 0.0
+    numbers = _NUM_RE.findall(text)
+    return float(numbers[-1]) if numbers else 0.0
+
+def iter_tally_vouchers(response):
+    """Stream <VOUCHER> elements out of a Tally voucher export"""
+    return iter_tally_elements(response, "VOUCHER")
+
+def fetch_all_purchase_orders(num_orders=5, from_date=None, to_date=None):
+    """
+    Fetch Purchase Orders using XML approach similar to sales orders.
+    from_date / to_date (YYYYMMDD) narrow the export on the Tally side.
+    """
+    
+    # Tally filters by period itself, so only that range comes over the wire
+    date_filter = ""
+    if from_date:
+        date_filter += f"<SVFROMDATE>{from_date}</SVFROMDATE>"
+    if to_date:
+        date_filter += f"<SVTODATE>{to_date}</SVTODATE>"
     
     # XML request to get all Purchase Order vouchers
     # Using Voucher Register report which is reliable
-    xml_request = """<ENVELOPE><HEADER><TALLYREQUEST>Export Data</TALLYREQUEST></HEADER>
+    xml_request = f"""<ENVELOPE><HEADER><TALLYREQUEST>Export Data</TALLYREQUEST></HEADER>
     <BODY><EXPORTDATA><REQUESTDESC><REPORTNAME>Voucher Register</REPORTNAME>
     <STATICVARIABLES><SVEXPORTFORMAT>$$SysName:XML</SVEXPORTFORMAT>
     <VOUCHERTYPENAME>Purchase Order</VOUCHERTYPENAME>
+    {date_filter}
     </STATICVARIABLES></REQUESTDESC></EXPORTDATA></BODY></ENVELOPE>"""
     
     try:
-        response = requests.post(TALLY_URL, data=xml_request, timeout=30)
+        response = requests.post(TALLY_URL, data=xml_request, timeout=30, stream=True)
         
         if response.status_code != 200:
             print(f"Error: HTTP {response.status_code}")
             return
         
-        soup = BeautifulSoup(response.content, 'lxml-xml')
-        
-        # Find all vouchers
-        all_vouchers = soup.find_all('VOUCHER')
-        
-        if not all_vouchers:
-            print("No Purchase Orders found!")
-            print("\nChecking if Tally is running and accessible...")
-            return
-        
-        # Limit to the requested number
-        vouchers = all_vouchers[:num_orders]
-        
-        print(f"\nShowing {len(vouchers)} of {len(all_vouchers)} total Purchase Order(s)")
-        print("=" * 150)
-        
-        for idx, v in enumerate(vouchers, 1):
-            # Extract header information
-            date = v.find('DATE')
-            v_no = v.find('VOUCHERNUMBER')
-            party = v.find('PARTYNAME')
-            ref = v.find('REFERENCE')
+        # Vouchers are printed as they stream in; parsing stops after
+        # num_orders, so the rest of the export is never read
+        shown = 0
+        for idx, v in enumerate(iter_tally_vouchers(response), 1):
+            # Each voucher's report is built up and written in one go
+            out = []
+            if idx == 1:
+                out.append(f"\nShowing up to {num_orders} Purchase Order(s)\n")
+                out.append("=" * 150 + "\n")
+            shown = idx
             
-            date_str = date.text if date else ""
-            v_no_str = v_no.text if v_no else ""
-            party_str = party.text if party else ""
-            ref_str = ref.text if ref else ""
+            # Extract header information
+            date_str = v.findtext('.//DATE', "")
+            v_no_str = v.findtext('.//VOUCHERNUMBER', "")
+            party_str = v.findtext('.//PARTYNAME', "")
+            ref_str = v.findtext('.//REFERENCE', "")
             
             # Get Payment Terms
             payment_terms = ""
-            bill_alloc = v.find('BILLALLOCATIONS.LIST')
-            if bill_alloc:
-                bill_credit = bill_alloc.find('BILLCREDITPERIOD')
-                if bill_credit and bill_credit.text:
-                    payment_terms = bill_credit.text.strip()
+            bill_alloc = v.find('.//BILLALLOCATIONS.LIST')
+            if bill_alloc is not None:
+                bill_credit = bill_alloc.findtext('.//BILLCREDITPERIOD')
+                if bill_credit:
+                    payment_terms = bill_credit.strip()
             
             # If not found, check BASICDUEDATEOFPYMT
             if not payment_terms:
-                due_date = v.find('BASICDUEDATEOFPYMT')
-                if due_date and due_date.text:
-                    payment_terms = due_date.text.strip()
+                due_date = v.findtext('.//BASICDUEDATEOFPYMT')
+                if due_date:
+                    payment_terms = due_date.strip()
             
             # Get Order Status
-            order_status = v.find('ORDERSTATUS').text if v.find('ORDERSTATUS') else "Pending"
+            order_status = v.findtext('.//ORDERSTATUS', "Pending")
             
             # Get Purchase Ledger using HIERARCHY METHOD (same as sales order)
             # Method 1: Try to get from stock item's ledger account
             purchase_ledger = ""
             purchase_ledger_from_item = ""
             
+            # Entry lists are looked up once and reused below
+            inv_entries = v.findall('.//INVENTORYENTRIES.LIST') or v.findall('.//ALLINVENTORYENTRIES.LIST')
+            led_entries = v.findall('.//LEDGERENTRIES.LIST') or v.findall('.//ALLLEDGERENTRIES.LIST')
+            
             # First, try to get purchase ledger from inventory entries
-            for item in v.find_all('INVENTORYENTRIES.LIST') or v.find_all('ALLINVENTORYENTRIES.LIST'):
+            for item in inv_entries:
                 # Check if there's a ledger associated with this item
-                item_ledger = item.find('LEDGERNAME')
-                if item_ledger and item_ledger.text:
-                    purchase_ledger_from_item = item_ledger.text.strip()
+                item_ledger = item.findtext('.//LEDGERNAME')
+                if item_ledger:
+                    purchase_ledger_from_item = item_ledger.strip()
                     break
             
-            # Method 2: If not found in items, find the ledger with LARGEST POSITIVE amount
-            # (excluding vendor, taxes, and rounding) - for purchases, the ledger has positive amount
-            if not purchase_ledger_from_item:
-                max_positive_amount = 0
-                for entry in v.find_all('LEDGERENTRIES.LIST') or v.find_all('ALLLEDGERENTRIES.LIST'):
-                    name = entry.find('LEDGERNAME').text.strip() if entry.find('LEDGERNAME') else ""
-                    amt_tag = entry.find('AMOUNT')
-                    if amt_tag and amt_tag.text:
-                        import re
-                        amount_text = amt_tag.text.strip()
-                        numbers = re.findall(r'[-\d.]+', amount_text)
-                        if numbers:
-                            amt = float(numbers[-1])
-                        else:
-                            amt = 0.0
-                    else:
-                        amt = 0.0
-                    
-                    # Skip vendor ledger, tax ledgers, and rounding off
-                    name_lower = name.lower()
-                    if name == party_str:  # Skip vendor
-                        continue
-                    if 'cgst' in name_lower or 'sgst' in name_lower or 'igst' in name_lower:  # Skip taxes
-                        continue
-                    if 'rounding' in name_lower:  # Skip rounding
-                        continue
-                    
-                    # Find the ledger with largest positive amount (this is the purchase ledger)
-                    if amt > max_positive_amount:
-                        max_positive_amount = amt
-                        purchase_ledger = name
-            else:
+            # Single pass over ledger entries: collect the tax rows for the tax
+            # table, and for Method 2 the ledger with LARGEST POSITIVE amount
+            # (excluding vendor, taxes, and rounding) - for purchases, the ledger
+            # has positive amount. It is only used if no item ledger was found.
+            tax_rows = []
+            max_positive_amount = 0
+            for entry in led_entries:
+                name = (entry.findtext('.//LEDGERNAME') or "").strip()
+                amt = _parse_amount(entry.findtext('.//AMOUNT'))
+                
+                name_lower = name.lower()
+                if 'cgst' in name_lower or 'sgst' in name_lower or 'igst' in name_lower:  # Taxes
+                    tax_rows.append((name, amt))
+                    continue
+                if name == party_str:  # Skip vendor
+                    continue
+                if 'rounding' in name_lower:  # Skip rounding
+                    continue
+                
+                # Find the ledger with largest positive amount (this is the purchase ledger)
+                if amt > max_positive_amount:
+                    max_positive_amount = amt
+                    purchase_ledger = name
+            
+            if purchase_ledger_from_item:
                 purchase_ledger = purchase_ledger_from_item
             
-            print(f"\n{'='*150}")
-            print(f"PURCHASE ORDER #{idx}")
-            print(f"{'='*150}")
-            print(f"Date: {date_str}")
-            print(f"PO Number: {v_no_str}")
-            print(f"Party Name (Vendor): {party_str}")
-            print(f"Reference: {ref_str}")
-            print(f"Purchase Ledger: {purchase_ledger}")
-            print(f"Payment Terms: {payment_terms if payment_terms else '(not specified)'}")
-            print(f"Order Status: {order_status}")
+            out.append(f"\n{'='*150}\n")
+            out.append(f"PURCHASE ORDER #{idx}\n")
+            out.append(f"{'='*150}\n")
+            out.append(f"Date: {date_str}\n")
+            out.append(f"PO Number: {v_no_str}\n")
+            out.append(f"Party Name (Vendor): {party_str}\n")
+            out.append(f"Reference: {ref_str}\n")
+            out.append(f"Purchase Ledger: {purchase_ledger}\n")
+            out.append(f"Payment Terms: {payment_terms if payment_terms else '(not specified)'}\n")
+            out.append(f"Order Status: {order_status}\n")
             
             # Get Item Details
-            print(f"\n{'ITEM NAME':<50} | {'QUANTITY':<12} | {'RATE':<12} | {'AMOUNT':<15} | {'CATEGORY':<20} | {'COST CENTRE':<20}")
-            print("-" * 180)
+            out.append(f"\n{'ITEM NAME':<50} | {'QUANTITY':<12} | {'RATE':<12} | {'AMOUNT':<15} | {'CATEGORY':<20} | {'COST CENTRE':<20}\n")
+            out.append("-" * 180 + "\n")
             
             # Find inventory entries
-            for item in v.find_all('INVENTORYENTRIES.LIST') or v.find_all('ALLINVENTORYENTRIES.LIST'):
-                item_name = item.find('STOCKITEMNAME').text.strip() if item.find('STOCKITEMNAME') else ""
+            for item in inv_entries:
+                item_name = (item.findtext('.//STOCKITEMNAME') or "").strip()
                 
                 # Get quantity
-                qty_tag = item.find('ACTUALQTY') or item.find('BILLEDQTY')
-                quantity = qty_tag.text.strip() if qty_tag else "0"
+                qty_tag = item.find('.//ACTUALQTY')
+                if qty_tag is None:
+                    qty_tag = item.find('.//BILLEDQTY')
+                quantity = (qty_tag.text or "").strip() if qty_tag is not None else "0"
                 
                 # Get rate
-                rate_tag = item.find('RATE')
-                if rate_tag and rate_tag.text:
-                    rate_text = rate_tag.text.split('/')[0].strip()
-                    import re
-                    numbers = re.findall(r'[-\d.]+', rate_text)
-                    if numbers:
-                        rate = float(numbers[-1])
-                    else:
-                        rate = 0.0
-                else:
-                    rate = 0.0
+                rate = _parse_amount((item.findtext('.//RATE') or "").split('/')[0])
                 
                 # Get amount
-                amount_tag = item.find('AMOUNT')
-                if amount_tag and amount_tag.text:
-                    amount_text = amount_tag.text.strip()
-                    import re
-                    numbers = re.findall(r'[-\d.]+', amount_text)
-                    if numbers:
-                        amount = float(numbers[-1])
-                    else:
-                        amount = 0.0
-                else:
-                    amount = 0.0
+                amount = _parse_amount(item.findtext('.//AMOUNT'))
                 
                 # Get reporting tags (Category and Cost Centre)
                 category = ""
                 cost_centre = ""
-                cat_alloc = item.find('CATEGORYALLOCATIONS.LIST')
-                if cat_alloc:
-                    category_tag = cat_alloc.find('CATEGORY')
-                    if category_tag:
-                        category = category_tag.text.strip()
-                    cc_list = cat_alloc.find('COSTCENTREALLOCATIONS.LIST')
-                    if cc_list:
-                        cc_name = cc_list.find('NAME')
-                        if cc_name:
-                            cost_centre = cc_name.text.strip()
+                cat_alloc = item.find('.//CATEGORYALLOCATIONS.LIST')
+                if cat_alloc is not None:
+                    category = (cat_alloc.findtext('.//CATEGORY') or "").strip()
+                    cc_list = cat_alloc.find('.//COSTCENTREALLOCATIONS.LIST')
+                    if cc_list is not None:
+                        cost_centre = (cc_list.findtext('.//NAME') or "").strip()
                 
-                print(f"{item_name:<50} | {quantity:<12} | {rate:<12.2f} | {abs(amount):<15.2f} | {category:<20} | {cost_centre:<20}")
+                out.append(f"{item_name:<50} | {quantity:<12} | {rate:<12.2f} | {abs(amount):<15.2f} | {category:<20} | {cost_centre:<20}\n")
             
             # Get Tax Details
-            print(f"\n{'TAX TYPE':<40} | {'AMOUNT':<15}")
-            print("-" * 150)
-            
-            for entry in v.find_all('LEDGERENTRIES.LIST') or v.find_all('ALLLEDGERENTRIES.LIST'):
-                name = entry.find('LEDGERNAME').text.strip() if entry.find('LEDGERNAME') else ""
-                amount_tag = entry.find('AMOUNT')
-                if amount_tag and amount_tag.text:
-                    amount_text = amount_tag.text.strip()
-                    import re
-                    numbers = re.findall(r'[-\d.]+', amount_text)
-                    if numbers:
-                        amt = float(numbers[-1])
-                    else:
-                        amt = 0.0
-                else:
-                    amt = 0.0
-                
-                # Check for tax ledgers
-                name_lower = name.lower()
-                if ('cgst' in name_lower or 'sgst' in name_lower or 'igst' in name_lower):
-                    print(f"{name:<40} | {abs(amt):<15.2f}")
+            out.append(f"\n{'TAX TYPE':<40} | {'AMOUNT':<15}\n")
+            out.append("-" * 150 + "\n")
+            
+            for name, amt in tax_rows:
+                out.append(f"{name:<40} | {abs(amt):<15.2f}\n")
             
             # Get Narration
-            narration = v.find('NARRATION').text if v.find('NARRATION') else ""
-            print(f"\nNarration: {narration if narration else '(blank)'}")
-            print("-" * 150)
+            narration = v.findtext('.//NARRATION', "")
+            out.append(f"\nNarration: {narration if narration else '(blank)'}\n")
+            out.append("-" * 150 + "\n")
+            
+            sys.stdout.write("".join(out))
+            
+            if idx >= num_orders:
+                break
+        
+        response.close()
+        
+        if not shown:
+            print("No Purchase Orders found!")
+            print("\nChecking if Tally is running and accessible...")
+            return
+        
+        print(f"\nShowed {shown} Purchase Order(s)")
         
     except Exception as e:
         print(f"Error: {e}")
@@ -230,5 +223,9 @@ if __name__ == "__main__":
         print("Invalid input. Using default: 5")
         num_orders = 5
     
+    # Optional date range, applied by Tally before anything is sent
+    from_date = input("From date YYYYMMDD (blank for all dates): ").strip() or None
+    to_date = input("To date YYYYMMDD (blank for all dates): ").strip() or None
+    
     print(f"\nFetching {num_orders} purchase order(s)...\n")
-    fetch_all_purchase_orders(num_orders)
\ No newline at end of file
+    fetch_all_purchase_orders(num_orders, from_date, to_date)
\ No newline at end of file